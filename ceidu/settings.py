@@ -12,20 +12,25 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from .environment import database_config, env, env_bool, env_int, env_list, load_env_file
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Read KEY=VALUE pairs from .env (see .env.example); real environment wins.
+load_env_file(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-pb*c^_c549z145_)8o34%66ad-j3)f6g7c7q7lp7_%r!hz4zwo'
+SECRET_KEY = env('SECRET_KEY', 'django-insecure-pb*c^_c549z145_)8o34%66ad-j3)f6g7c7q7lp7_%r!hz4zwo')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool('DEBUG', True)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS')
 
 
 # Application definition
@@ -41,34 +46,67 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'django_filters',
     'corsheaders',
-    'wkhtmltopdf',
     'inspection',
 ]
 
 MIDDLEWARE = [
+    'inspection.middleware.RequestMetricsMiddleware',
+    'inspection.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'inspection.middleware.ReplicaRoutingMiddleware',
+    'inspection.middleware.QueryAuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request wall time, SQL count/time and response size, reported in the
+# Server-Timing header and aggregated per view at /api/metrics/.
+REQUEST_METRICS_ENABLED = env_bool('REQUEST_METRICS_ENABLED', True)
+REQUEST_METRICS_SERVER_TIMING = env_bool('REQUEST_METRICS_SERVER_TIMING', True)
+
+# N+1 and slow query detection (development and staging). Repeated query
+# templates and slow queries are logged to the "inspection.queries" logger;
+# "manage.py test" turns repeated queries into test failures.
+QUERY_AUDIT_ENABLED = env_bool('QUERY_AUDIT_ENABLED', DEBUG)
+QUERY_AUDIT_RAISE = env_bool('QUERY_AUDIT_RAISE', False)
+QUERY_AUDIT_NPLUSONE_THRESHOLD = env_int('QUERY_AUDIT_NPLUSONE_THRESHOLD', 5)
+QUERY_AUDIT_SLOW_MS = env_int('QUERY_AUDIT_SLOW_MS', 100)
+
+TEST_RUNNER = 'inspection.test_runner.QueryAuditTestRunner'
+
+# brotli/gzip response compression negotiated via Accept-Encoding (brotli
+# needs the brotli package). Responses below COMPRESSION_MIN_SIZE bytes are
+# sent uncompressed.
+COMPRESSION_ENABLED = env_bool('COMPRESSION_ENABLED', True)
+COMPRESSION_MIN_SIZE = env_int('COMPRESSION_MIN_SIZE', 1024)
+COMPRESSION_BROTLI_QUALITY = env_int('COMPRESSION_BROTLI_QUALITY', 5)
+
 ROOT_URLCONF = 'ceidu.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
+        'APP_DIRS': False,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory; the development server
+            # clears them when a template file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -78,14 +116,57 @@ WSGI_APPLICATION = 'ceidu.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# The profile is selected by DATABASE_URL. Without it the bundled SQLite
+# database is used; a postgresql:// URL selects the production profile with
+# persistent connections, health checks and optional pooling (DB_POOL=True).
+# See .env.example for the available variables.
 
 DATABASES = {
+    'default': database_config(env('DATABASE_URL', 'sqlite:///db.sqlite3'), base_dir=BASE_DIR),
+}
+
+# Optional read replica for report, daily data, PDF and export reads.
+# Clients read from the primary for REPLICA_STICKY_SECONDS after their own
+# writes. A second SQLite file works for local testing after running
+# "migrate --database replica" on it.
+DATABASE_REPLICA_ALIAS = 'replica'
+REPLICA_STICKY_SECONDS = env_int('REPLICA_STICKY_SECONDS', 10)
+
+if env('DATABASE_REPLICA_URL'):
+    DATABASES[DATABASE_REPLICA_ALIAS] = database_config(env('DATABASE_REPLICA_URL'), base_dir=BASE_DIR)
+    DATABASES[DATABASE_REPLICA_ALIAS]['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['inspection.db_routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# CACHE_BACKEND selects locmem (default, per process), file (shared between
+# processes on one host) or redis (any Redis-compatible server, requires
+# the redis package). Reference endpoints (equipment, users, checklist
+# items) cache their responses for RESPONSE_CACHE_TIMEOUT seconds; changes
+# to those models invalidate them immediately.
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'ceidu'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[env('CACHE_BACKEND', 'locmem')]
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': _cache_backend,
+        'LOCATION': env('CACHE_LOCATION', _cache_location),
     }
 }
 
+RESPONSE_CACHE_ENABLED = env_bool('RESPONSE_CACHE_ENABLED', True)
+RESPONSE_CACHE_TIMEOUT = env_int('RESPONSE_CACHE_TIMEOUT', 300)
+RESPONSE_CACHE_ALIAS = 'default'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -111,7 +192,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 LANGUAGE_CODE = 'en-us'
 
-TIME_ZONE = 'UTC'
+TIME_ZONE = env('TIME_ZONE', 'UTC')
 
 USE_I18N = True
 
@@ -128,6 +209,13 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# How authenticated downloads (attachments, stored PDFs) are sent: 'django'
+# streams them from the worker; 'x-accel-redirect' (nginx) or 'x-sendfile'
+# (Apache mod_xsendfile, lighttpd) lets the front web server send the file.
+MEDIA_SENDFILE_BACKEND = env('MEDIA_SENDFILE_BACKEND', 'django')
+# Internal nginx location that maps to MEDIA_ROOT, for X-Accel-Redirect.
+MEDIA_ACCEL_REDIRECT_PREFIX = env('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -142,6 +230,15 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',  # Keep for browsable API
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'inspection.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'inspection.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -150,6 +247,20 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Maximum number of IDs accepted by batch endpoints (?ids=1,2,3).
+API_BATCH_MAX_IDS = env_int('API_BATCH_MAX_IDS', 100)
+
+# Longest date range, in days, of an equipment timeline request.
+API_TIMELINE_MAX_DAYS = env_int('API_TIMELINE_MAX_DAYS', 366)
+
+# First day of a compliance week; reports and the printed form run Saturday
+# to Friday.
+COMPLIANCE_WEEK_START = env('COMPLIANCE_WEEK_START', 'saturday')
+
+# JSON encoding backend for API responses and request bodies: auto (orjson
+# when installed, otherwise the standard library), orjson or stdlib.
+JSON_BACKEND = env('JSON_BACKEND', 'auto')
+
 # CORS Configuration for API access
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -185,15 +296,22 @@ CORS_ALLOWED_HEADERS = [
     'x-requested-with',
 ]
 
-# wkhtmltopdf settings
-WKHTMLTOPDF_CMD = 'wkhtmltopdf'  # Will use system installed wkhtmltopdf
-WKHTMLTOPDF_CMD_OPTIONS = {
-    'page-size': 'A4',
-    'margin-top': '0.75in',
-    'margin-right': '0.75in',
-    'margin-bottom': '0.75in',
-    'margin-left': '0.75in',
-    'encoding': 'UTF-8',
-    'orientation': 'Portrait',
-    'no-outline': None,
-}
+# PDF rendering (see inspection/pdf_engines.py). PDF_ENGINE is wkhtmltopdf,
+# weasyprint or auto (wkhtmltopdf when the binary is found, else WeasyPrint).
+PDF_ENGINE = env('PDF_ENGINE', 'auto')
+WKHTMLTOPDF_CMD = env('WKHTMLTOPDF_CMD', 'wkhtmltopdf')
+# Warm worker processes for WeasyPrint (0 renders in the request thread);
+# workers are replaced after PDF_WORKER_MAX_TASKS renders.
+PDF_POOL_SIZE = env_int('PDF_POOL_SIZE', 2)
+PDF_WORKER_MAX_TASKS = env_int('PDF_WORKER_MAX_TASKS', 200)
+# PDFs rendered at the same time per process, and the seconds a render (or
+# the wait for a free slot) may take.
+PDF_MAX_CONCURRENCY = env_int('PDF_MAX_CONCURRENCY', 4)
+PDF_RENDER_TIMEOUT = env_int('PDF_RENDER_TIMEOUT', 60)
+# Attachments are embedded as downsampled JPEGs (see inspection/images.py):
+# longest side in pixels, JPEG quality, total image bytes per PDF and the
+# media subdirectory where the variants are kept.
+PDF_IMAGE_MAX_DIMENSION = env_int('PDF_IMAGE_MAX_DIMENSION', 1200)
+PDF_IMAGE_QUALITY = env_int('PDF_IMAGE_QUALITY', 70)
+PDF_IMAGE_BYTE_BUDGET = env_int('PDF_IMAGE_BYTE_BUDGET', 2 * 1024 * 1024)
+PDF_IMAGE_VARIANT_DIR = env('PDF_IMAGE_VARIANT_DIR', 'pdf_variants')
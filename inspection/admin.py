@@ -1,8 +1,89 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from . import search
 from .models import (
     Equipment, Users, ChecklistItems, InspectionReports,
     DailyInspectionData, ReportNotes, ReportAttachments
 )
+from .paginators import EstimatedCountPaginator
+
+
+class EquipmentTypeFilter(admin.SimpleListFilter):
+    """
+    Filter by equipment type. The choices come from the equipment table
+    instead of a DISTINCT over the (much larger) filtered table.
+    """
+    title = 'equipment type'
+    parameter_name = 'equipment_type'
+
+    def lookups(self, request, model_admin):
+        types = Equipment.objects.order_by('equipment_type').values_list('equipment_type', flat=True).distinct()
+        return [(equipment_type, equipment_type) for equipment_type in types]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            equipment = Equipment.objects.filter(equipment_type=self.value()).values('pk')
+            return queryset.filter(equipment__in=equipment)
+        return queryset
+
+
+class ReportEquipmentTypeFilter(EquipmentTypeFilter):
+    """Equipment type filter for models that belong to a report."""
+
+    def queryset(self, request, queryset):
+        if self.value():
+            reports = InspectionReports.objects.filter(equipment__equipment_type=self.value()).values('pk')
+            return queryset.filter(report__in=reports)
+        return queryset
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow to hundreds of thousands of rows."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # skip the second COUNT(*) of the whole table when filtering
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset that loads and edits one page of the related rows."""
+    per_page = 50
+    query_params = None
+
+    @property
+    def page_param(self):
+        return f'{self.prefix}-page'
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            queryset = super().get_queryset()
+            page_number = self.query_params.get(self.page_param) if self.query_params else None
+            self.page = Paginator(queryset, self.per_page).get_page(page_number)
+            self._queryset = self.page.object_list
+        return self._queryset
+
+    @property
+    def page_links(self):
+        """(number, url) pairs for the pager; url is None for the ellipsis."""
+        params = self.query_params.copy()
+        for number in self.page.paginator.get_elided_page_range(self.page.number):
+            if number == Paginator.ELLIPSIS:
+                yield number, None
+            else:
+                params[self.page_param] = number
+                yield number, f'?{params.urlencode()}'
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """Tabular inline showing ``per_page`` rows at a time with a pager below."""
+    formset = PaginatedInlineFormSet
+    template = 'inspection/admin/paginated_tabular.html'
+    per_page = 50
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.query_params = request.GET
+        return formset
 
 
 @admin.register(Equipment)
@@ -25,14 +106,32 @@ class UsersAdmin(admin.ModelAdmin):
 class ChecklistItemsAdmin(admin.ModelAdmin):
     list_display = ['item_id', 'sort_order', 'item_description']
     list_editable = ['sort_order']
+    search_fields = ['item_description']
     ordering = ['sort_order']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Answer from the full-text index; also serves Arabic spelling variants.
+        if not search_term:
+            return queryset, False
+        return search.filter_matching(queryset, search_term, {'checklist_item': 'pk'}), False
 
-class DailyInspectionDataInline(admin.TabularInline):
+
+class DailyInspectionDataInline(PaginatedTabularInline):
     model = DailyInspectionData
     extra = 0
     readonly_fields = ['inspection_data_id']
 
+    def get_queryset(self, request):
+        # Each row is labelled with str(), which reads the report and the item.
+        return super().get_queryset(request).select_related('report', 'item')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'item':
+            # Load the checklist once for the page instead of once per row.
+            formfield.choices = list(formfield.choices)
+        return formfield
+
 
 class ReportNotesInline(admin.TabularInline):
     model = ReportNotes
@@ -47,11 +146,12 @@ class ReportAttachmentsInline(admin.TabularInline):
 
 
 @admin.register(InspectionReports)
-class InspectionReportsAdmin(admin.ModelAdmin):
+class InspectionReportsAdmin(LargeTableAdmin):
     list_display = ['report_id', 'report_number', 'equipment', 'operator', 'supervisor', 'start_date', 'end_date', 'created_at']
-    list_filter = ['start_date', 'end_date', 'equipment__equipment_type', 'created_at']
+    list_select_related = ['equipment', 'operator', 'supervisor']
+    list_filter = ['start_date', 'end_date', EquipmentTypeFilter, 'created_at']
     search_fields = ['report_number', 'equipment__serial_number', 'operator__full_name', 'supervisor__full_name']
-    date_hierarchy = 'start_date'
+    autocomplete_fields = ['equipment', 'operator', 'supervisor']
     ordering = ['-created_at']
     inlines = [DailyInspectionDataInline, ReportNotesInline, ReportAttachmentsInline]
     
@@ -74,21 +174,29 @@ class InspectionReportsAdmin(admin.ModelAdmin):
 
 
 @admin.register(DailyInspectionData)
-class DailyInspectionDataAdmin(admin.ModelAdmin):
+class DailyInspectionDataAdmin(LargeTableAdmin):
     list_display = ['inspection_data_id', 'report', 'item', 'inspection_date', 'status']
-    list_filter = ['status', 'inspection_date', 'report__equipment__equipment_type']
+    list_select_related = ['report__equipment', 'item']
+    list_filter = ['status', 'inspection_date', ReportEquipmentTypeFilter]
     search_fields = ['report__report_number', 'item__item_description']
-    date_hierarchy = 'inspection_date'
+    autocomplete_fields = ['report', 'item']
     ordering = ['-inspection_date', 'item__sort_order']
 
 
 @admin.register(ReportNotes)
-class ReportNotesAdmin(admin.ModelAdmin):
+class ReportNotesAdmin(LargeTableAdmin):
     list_display = ['note_id', 'report', 'note_text_preview', 'created_at']
-    list_filter = ['created_at', 'report__equipment__equipment_type']
+    list_select_related = ['report__equipment']
+    list_filter = ['created_at', ReportEquipmentTypeFilter]
     search_fields = ['report__report_number', 'note_text']
-    date_hierarchy = 'created_at'
+    autocomplete_fields = ['report']
     ordering = ['-created_at']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Answer from the full-text index rather than LIKE scans over note_text.
+        if not search_term:
+            return queryset, False
+        return search.filter_matching(queryset, search_term, {'note': 'pk', 'report': 'report_id'}), False
     
     def note_text_preview(self, obj):
         return obj.note_text[:100] + '...' if len(obj.note_text) > 100 else obj.note_text
@@ -96,13 +204,16 @@ class ReportNotesAdmin(admin.ModelAdmin):
 
 
 @admin.register(ReportAttachments)
-class ReportAttachmentsAdmin(admin.ModelAdmin):
+class ReportAttachmentsAdmin(LargeTableAdmin):
     list_display = ['attachment_id', 'report', 'file_name', 'caption', 'uploaded_at']
-    list_filter = ['uploaded_at', 'report__equipment__equipment_type']
+    list_select_related = ['report__equipment']
+    list_filter = ['uploaded_at', ReportEquipmentTypeFilter]
     search_fields = ['report__report_number', 'caption']
-    date_hierarchy = 'uploaded_at'
+    autocomplete_fields = ['report']
     ordering = ['-uploaded_at']
     
     def file_name(self, obj):
-        return obj.file_path.name.split('/')[-1] if obj.file_path.name else 'No file'
+        if not obj.file_path.name:
+            return 'No file'
+        return obj.original_filename or obj.file_path.name.split('/')[-1]
     file_name.short_description = 'File Name'
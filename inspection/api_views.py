@@ -18,6 +18,8 @@ def api_root(request, format=None):
         'daily-inspection-data': reverse('daily-inspection-data-list', request=request, format=format),
         'report-notes': reverse('report-notes-list', request=request, format=format),
         'report-attachments': reverse('report-attachments-list', request=request, format=format),
+        'compliance': reverse('compliance-list', request=request, format=format),
+        'search': reverse('search', request=request, format=format),
         'api-auth': reverse('rest_framework:login', request=request, format=format),
         'admin': request.build_absolute_uri('/admin/'),
     })
\ No newline at end of file
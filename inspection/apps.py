@@ -5,3 +5,6 @@ class InspectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inspection'
     verbose_name = 'Daily Equipment Inspection System'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,198 @@
+"""
+Archival of old inspection reports.
+
+``archive_reports()`` moves reports whose week ended before a cutoff into
+a gzip-compressed JSON Lines file, one line per report with its daily
+data, notes and attachment records, and then deletes them. The attachment
+files are copied into a tar next to it (``attachments_path()``), under
+their storage names, so extracting it into MEDIA_ROOT restores them.
+
+Reports are handled in batches of IDs, each in its own short transaction.
+The batch, with its attachment files, is written and synced to the
+archive before anything is deleted, and the rows are removed with one set-based DELETE per table
+instead of Django's cascade collector, which loads every child row and
+sends signals one object at a time. What those signals would do is done
+here per batch:
+
+- search index entries of the reports and their notes are deleted;
+- compliance rows pointing at the reports get a NULL report;
+- once the transaction has committed, stored PDFs are deleted, and
+  attachment files once no other attachment uses them (blobs can be
+  shared, see blobs.py).
+
+No cached API response holds report data (see cache.py), so there is
+nothing to invalidate there.
+
+Re-running after an interruption archives the remaining reports; a batch
+whose delete failed may appear twice in the file, keyed by report_id.
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+import tarfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+
+from . import search
+from .models import (
+    ComplianceStatus, DailyInspectionData, InspectionReports, RenderedReportPDF, ReportAttachments, ReportNotes,
+)
+
+logger = logging.getLogger('inspection.archive')
+
+# key in the archived record -> (model, fields)
+CHILDREN = {
+    'daily_data': (DailyInspectionData, ['inspection_data_id', 'item_id', 'inspection_date', 'status']),
+    'notes': (ReportNotes, ['note_id', 'note_text', 'created_at']),
+    'attachments': (ReportAttachments, [
+        'attachment_id', 'file_path', 'original_filename', 'content_hash', 'caption', 'uploaded_at',
+    ]),
+}
+
+
+def report_batches(cutoff, batch_size, using):
+    """Lists of IDs of reports that ended before ``cutoff``, in ID order."""
+    reports = InspectionReports.objects.using(using).filter(end_date__lt=cutoff).order_by('report_id')
+    last_id = 0
+    while True:
+        ids = list(reports.filter(report_id__gt=last_id).values_list('report_id', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def report_records(ids, using):
+    """Archive records of the reports ``ids``, one query per table."""
+    records = {
+        report['report_id']: {**report, **{key: [] for key in CHILDREN}}
+        for report in InspectionReports.objects.using(using).filter(report_id__in=ids).order_by('report_id').values()
+    }
+    for key, (model, fields) in CHILDREN.items():
+        rows = model.objects.using(using).filter(report_id__in=ids).order_by(model._meta.pk.name)
+        for row in rows.values('report_id', *fields):
+            records[row.pop('report_id')][key].append(row)
+    return list(records.values())
+
+
+def _delete(cursor, connection, table, ids):
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f'DELETE FROM {connection.ops.quote_name(table)} WHERE report_id IN ({placeholders})', ids)
+    return cursor.rowcount
+
+
+def purge_reports(ids, using):
+    """Delete the reports ``ids`` and everything referring to them; returns rows deleted per table."""
+    from .signals import release_attachment_file
+
+    connection = connections[using]
+    deleted = {}
+    with transaction.atomic(using=using):
+        attachment_names = set(
+            ReportAttachments.objects.using(using).filter(report_id__in=ids).values_list('file_path', flat=True)
+        )
+        pdf_names = list(RenderedReportPDF.objects.using(using).filter(report_id__in=ids).values_list('file', flat=True))
+        note_ids = list(ReportNotes.objects.using(using).filter(report_id__in=ids).values_list('note_id', flat=True))
+        ComplianceStatus.objects.using(using).filter(report_id__in=ids).update(report=None)
+        with connection.cursor() as cursor:
+            for model in (DailyInspectionData, ReportNotes, ReportAttachments, RenderedReportPDF, InspectionReports):
+                table = model._meta.db_table
+                deleted[table] = _delete(cursor, connection, table, ids)
+        search.remove_objects('note', note_ids, using=using)
+        search.remove_objects('report', ids, using=using)
+
+        def delete_files():
+            storage = ReportAttachments._meta.get_field('file_path').storage
+            for name in attachment_names - {''}:
+                release_attachment_file(storage, name)
+            pdf_storage = RenderedReportPDF._meta.get_field('file').storage
+            for name in pdf_names:
+                if name:
+                    pdf_storage.delete(name)
+
+        # Rows of a failed transaction come back; their files must still be there.
+        transaction.on_commit(delete_files, using=using)
+    return deleted
+
+
+def open_archive(path):
+    """Text stream appending a gzip member to ``path``, and the underlying file for syncing."""
+    raw = open(path, 'ab')
+    return io.TextIOWrapper(gzip.GzipFile(fileobj=raw, mode='ab'), encoding='utf-8'), raw
+
+
+def attachments_path(path):
+    """The tar holding the attachment files of the archive at ``path``."""
+    for suffix in ('.gz', '.jsonl'):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+    return path + '.attachments.tar'
+
+
+def archive_files(tar, names, storage):
+    """
+    Add the stored files ``names`` to ``tar`` unless it has them already
+    (blobs can be shared); returns how many were added.
+    """
+    added = 0
+    for name in sorted(names - set(tar.getnames()) - {''}):
+        try:
+            info = tarfile.TarInfo(name)
+            info.size = storage.size(name)
+            info.mtime = int(storage.get_modified_time(name).timestamp())
+            with storage.open(name, 'rb') as handle:
+                tar.addfile(info, handle)
+        except OSError:
+            logger.warning('Attachment file %s is missing; only its record is archived', name)
+            continue
+        added += 1
+    return added
+
+
+def archive_reports(cutoff, path, batch_size=200, using=None):
+    """
+    Archive to ``path`` (attachment files to ``attachments_path(path)``) and
+    delete the reports whose week ended before ``cutoff``; returns (reports
+    archived, rows deleted per table, attachment files archived).
+    """
+    using = using or router.db_for_write(InspectionReports)
+    storage = ReportAttachments._meta.get_field('file_path').storage
+    archived = files = 0
+    deleted = {}
+    archive, raw = open_archive(path)
+    tar = None
+    try:
+        tar = tarfile.open(attachments_path(path), 'a')
+        for ids in report_batches(cutoff, batch_size, using):
+            records = report_records(ids, using)
+            for record in records:
+                archive.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+            archive.flush()  # also flushes the gzip stream to ``raw``
+            os.fsync(raw.fileno())
+            names = {attachment['file_path'] for record in records for attachment in record['attachments']}
+            files += archive_files(tar, names, storage)
+            tar.fileobj.flush()
+            os.fsync(tar.fileobj.fileno())
+            for table, count in purge_reports(ids, using).items():
+                deleted[table] = deleted.get(table, 0) + count
+            archived += len(ids)
+    finally:
+        if tar is not None:
+            tar.close()
+        archive.close()
+        raw.close()
+    return archived, deleted, files
+
+
+def count_archivable(cutoff, using=None):
+    """Rows that ``archive_reports(cutoff)`` would remove, per table."""
+    using = using or router.db_for_write(InspectionReports)
+    reports = InspectionReports.objects.using(using).filter(end_date__lt=cutoff)
+    counts = {InspectionReports._meta.db_table: reports.count()}
+    for model in (DailyInspectionData, ReportNotes, ReportAttachments, RenderedReportPDF):
+        counts[model._meta.db_table] = model.objects.using(using).filter(report__in=reports).count()
+    return counts
@@ -0,0 +1,53 @@
+"""
+Content-addressed storage of attachment files.
+
+An uploaded attachment is stored under the SHA-256 of its content,
+``inspection_attachments/blobs/ab/cd/abcd....jpg``, so re-uploading the
+same photo to several reports stores it once: the upload is hashed before
+saving and, when a blob with that hash already exists, the new row points
+at it instead of writing another copy. The name the file was uploaded
+under is kept in ``ReportAttachments.original_filename``.
+
+A blob is referenced by every attachment row whose ``file_path`` names it;
+when the last of them is deleted or switched to another file, the blob is
+removed once that transaction commits (signals.py). An upload only reuses
+a blob through a committed attachment that references it, locked until
+the upload commits, so it never points at a blob whose removal is
+pending; without one, the content is written again, under a suffixed
+name if the old file is still there. ``python manage.py deduplicate_attachments`` moves
+files uploaded before this scheme into it.
+"""
+
+import hashlib
+import os
+
+BLOB_DIR = 'inspection_attachments/blobs'
+
+
+def file_sha256(file):
+    """Hex SHA-256 of a Django File, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(content_hash, filename):
+    """Storage name of the blob with ``content_hash``; keeps the extension for content types."""
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{BLOB_DIR}/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{extension}'
+
+
+def attachment_upload_to(instance, filename):
+    # content_hash is set by the pre_save signal before the file is written.
+    return blob_name(instance.content_hash, filename)
+
+
+def is_blob(name):
+    return name.startswith(BLOB_DIR + '/')
+
+
+def blob_hash(name):
+    """The content hash a blob is named after (names may carry a storage suffix)."""
+    return os.path.basename(name)[:64]
@@ -0,0 +1,85 @@
+"""
+Response caching for read-heavy reference endpoints.
+
+Responses are cached per namespace (one per cached model) and keyed by
+path, query string and permission scope. Every namespace has a version
+token that is part of the key; saving or deleting a model instance
+replaces the token (see signals.py), which invalidates all cached
+responses of that namespace at once without having to find their keys.
+"""
+
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+VERSION_KEY = 'respcache:version:{}'
+
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def namespace_version(namespace):
+    """Return the current version token of ``namespace``."""
+    cache = response_cache()
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_namespace(namespace):
+    """Invalidate every cached response of ``namespace``."""
+    response_cache().set(VERSION_KEY.format(namespace), time.time_ns(), None)
+
+
+def permission_scope(request):
+    """Users that may see different data must not share cache entries."""
+    user = request.user
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    return 'staff' if user.is_staff else 'user'
+
+
+def response_cache_key(request, namespace):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    raw = '|'.join([request.path, query, permission_scope(request)])
+    digest = hashlib.sha256(raw.encode()).hexdigest()
+    return f'respcache:{namespace}:{namespace_version(namespace)}:{digest}'
+
+
+def cache_response(method):
+    """
+    Cache the data of successful responses returned by a viewset method.
+
+    The viewset provides ``cache_namespace``; the rendered format is chosen
+    per request as usual, only the serialized data is cached.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+            return method(self, request, *args, **kwargs)
+
+        cache = response_cache()
+        key = response_cache_key(request, self.cache_namespace)
+        cached = cache.get(key)
+        if cached is not None:
+            response = Response(cached)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+            response['X-Cache'] = 'MISS'
+        return response
+    return wrapper
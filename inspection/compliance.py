@@ -0,0 +1,115 @@
+"""
+Weekly inspection compliance of active equipment.
+
+For every active machine and week, the scan compares the checks that
+should exist by now (checklist items times the days of the week elapsed
+so far) with the distinct (item, day) cells recorded for that machine in
+DailyInspectionData, and stores the result in ComplianceStatus. Cells
+recorded by several overlapping reports count once.
+
+- ``missing_report``: no report covers any day of the week
+- ``incomplete``: a report exists but cells are missing
+- ``complete``: every expected cell is recorded
+
+Weeks start on COMPLIANCE_WEEK_START, Saturday by default like the
+reports and the printed form, so a report fills exactly one week.
+A scan reads a fixed number of grouped queries regardless of the number
+of machines and upserts one row per machine; rows of machines that are
+no longer active are dropped for the scanned weeks. Earlier weeks are
+kept as history and only recomputed when scanned again.
+"""
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Count, Max, Q, Value
+from django.db.models.functions import Cast, Concat
+
+from .models import ChecklistItems, ComplianceStatus, DailyInspectionData, Equipment, InspectionReports
+
+UPDATE_FIELDS = ['report', 'expected_cells', 'recorded_cells', 'missing_days', 'failed_cells', 'status', 'scanned_at']
+
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def week_start_of(day):
+    first_weekday = WEEKDAYS.index(getattr(settings, 'COMPLIANCE_WEEK_START', 'saturday').lower())
+    return day - timedelta(days=(day.weekday() - first_weekday) % 7)
+
+
+def scan_week(week_start, today=None, batch_size=1000):
+    """Recompute the compliance rows of the week starting on ``week_start``; returns {status: count}."""
+    today = today or date.today()
+    week_end = week_start + timedelta(days=6)
+    last_day = min(week_end, today)
+    elapsed_days = max((last_day - week_start).days + 1, 0)
+    expected_cells = ChecklistItems.objects.count() * elapsed_days
+
+    active = Equipment.objects.filter(status='active')
+    equipment_ids = list(active.values_list('pk', flat=True))
+
+    cell = Concat(Cast('item_id', CharField()), Value(':'), Cast('inspection_date', CharField()),
+                  output_field=CharField())
+    recorded = {
+        equipment_id: (cells, days, failed)
+        for equipment_id, cells, days, failed in DailyInspectionData.objects.filter(
+            report__equipment__in=active,
+            inspection_date__gte=week_start,
+            inspection_date__lte=last_day,
+        ).values_list('report__equipment_id').annotate(
+            cells=Count(cell, distinct=True),
+            days=Count('inspection_date', distinct=True),
+            failed=Count(cell, distinct=True, filter=Q(status='not_good')),
+        ).order_by()
+    }
+    latest_reports = dict(
+        InspectionReports.objects.filter(
+            equipment__in=active, start_date__lte=week_end, end_date__gte=week_start,
+        ).values_list('equipment_id').annotate(Max('report_id')).order_by()
+    )
+
+    rows = []
+    counts = {value: 0 for value, _ in ComplianceStatus.STATUS_CHOICES}
+    for equipment_id in equipment_ids:
+        cells, days, failed = recorded.get(equipment_id, (0, 0, 0))
+        report_id = latest_reports.get(equipment_id)
+        if report_id is None:
+            week_status = 'missing_report'
+        elif cells < expected_cells:
+            week_status = 'incomplete'
+        else:
+            week_status = 'complete'
+        counts[week_status] += 1
+        rows.append(ComplianceStatus(
+            equipment_id=equipment_id,
+            week_start=week_start,
+            report_id=report_id,
+            expected_cells=expected_cells,
+            recorded_cells=cells,
+            missing_days=elapsed_days - days,
+            failed_cells=failed,
+            status=week_status,
+        ))
+
+    with transaction.atomic():
+        ComplianceStatus.objects.filter(week_start=week_start).exclude(equipment_id__in=active).delete()
+        ComplianceStatus.objects.bulk_create(
+            rows, batch_size=batch_size, update_conflicts=True,
+            unique_fields=['equipment', 'week_start'], update_fields=UPDATE_FIELDS,
+        )
+    return counts
+
+
+def scan(weeks=2, today=None):
+    """
+    Scan the current week and the ``weeks - 1`` before it (late entries
+    often arrive after the week ends). Returns [(week_start, counts)].
+    """
+    today = today or date.today()
+    current = week_start_of(today)
+    return [
+        (week_start, scan_week(week_start, today))
+        for week_start in (current - timedelta(weeks=offset) for offset in range(weeks))
+    ]
@@ -0,0 +1,78 @@
+"""
+Database routing for read replicas.
+
+Reads go to the primary database unless the current request was marked as
+safe to serve from the replica by ReplicaRoutingMiddleware. Views opt in
+with the ``read_from_replica`` attribute (viewsets and class-based views)
+or the ``replica_read`` decorator (function views).
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_read_alias = ContextVar('inspection_read_alias', default=None)
+
+# Authentication state must never be stale: a token created on the primary
+# has to be usable on the very next request.
+PRIMARY_ONLY_APPS = {'auth', 'authtoken', 'contenttypes', 'sessions'}
+
+
+def replica_alias():
+    """Return the configured replica alias, or None if no replica is set up."""
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def replica_read(view):
+    """Mark a function view as safe to read from the replica."""
+    view.read_from_replica = True
+    return view
+
+
+def uses_replica(view_func):
+    """Return True if a resolved view opted in to replica reads."""
+    if getattr(view_func, 'read_from_replica', False):
+        return True
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    return bool(getattr(view_class, 'read_from_replica', False))
+
+
+@contextmanager
+def reading_from(alias):
+    """Route ORM reads to ``alias`` for the duration of the block."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def activate_read_alias(alias):
+    """Route ORM reads to ``alias``; returns a token for deactivate_read_alias()."""
+    return _read_alias.set(alias)
+
+
+def deactivate_read_alias(token):
+    _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to the alias activated for the current request; writes to primary."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,154 @@
+"""
+Authenticated file downloads.
+
+``serve_file()`` answers a request for a stored file without reading it
+into memory:
+
+- conditional requests (If-None-Match, If-Modified-Since, ...) get 304/412
+  from the ETag and modification time, without opening the file;
+- a single ``Range: bytes=...`` gets 206 with just that slice (If-Range is
+  honoured; multiple ranges are answered with the whole file);
+- everything else streams the file in blocks with FileResponse.
+
+With MEDIA_SENDFILE_BACKEND set to ``x-accel-redirect`` (nginx) or
+``x-sendfile`` (Apache, lighttpd) the response only carries a header
+naming the file and the front web server sends it, including ranges.
+Django still checks permissions and answers conditional requests.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+class DownloadResponse(FileResponse):
+    block_size = 64 * 1024
+
+
+class FileRange:
+    """Read-only view of ``length`` bytes of an open file, starting at ``start``."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    The inclusive (start, end) of a single byte range, or None to send the
+    whole file. Raises RangeNotSatisfiable for ranges outside the file.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            raise RangeNotSatisfiable
+        end = min(int(last), size - 1) if last else size - 1
+        return start, end
+    length = int(last)
+    if length == 0 or size == 0:
+        raise RangeNotSatisfiable
+    return max(size - length, 0), size - 1
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag  # strong comparison: weak tags never match
+    return parse_http_date_safe(value) == last_modified
+
+
+def _sendfile_response(field_file, content_type):
+    backend = getattr(settings, 'MEDIA_SENDFILE_BACKEND', 'django')
+    if backend == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(field_file.name)
+        return response
+    if backend == 'x-sendfile':
+        try:
+            path = field_file.path
+        except NotImplementedError:  # storage without local paths
+            return None
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+    return None
+
+
+def serve_file(request, field_file, filename=None, content_type=None, as_attachment=True):
+    """Response for downloading ``field_file`` (a FieldFile); raises Http404 if it is missing."""
+    storage, name = field_file.storage, field_file.name
+    try:
+        size = storage.size(name)
+        modified = storage.get_modified_time(name)
+    except (OSError, NotImplementedError):
+        raise Http404('File not found')
+
+    filename = filename or os.path.basename(name)
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    last_modified = int(modified.timestamp())
+    etag = f'"{int(modified.timestamp() * 1_000_000):x}-{size:x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _sendfile_response(field_file, content_type)
+    if response is None:
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and _if_range_matches(request, etag, last_modified):
+            try:
+                byte_range = parse_range(request.META['HTTP_RANGE'], size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        file = storage.open(name, 'rb')
+        if byte_range is None:
+            response = DownloadResponse(file, content_type=content_type)
+            response['Content-Length'] = size
+        else:
+            start, end = byte_range
+            response = DownloadResponse(FileRange(file, start, end - start + 1), status=206,
+                                        content_type=content_type)
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Accept-Ranges'] = 'bytes'
+
+    if response.status_code not in (304, 412):
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True)
+    return response
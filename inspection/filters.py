@@ -0,0 +1,21 @@
+from rest_framework import filters
+
+from . import search
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter answered from the full-text search index (search.py)
+    instead of LIKE '%term%' scans.
+
+    The view's ``fulltext_search`` maps index kinds to the field that holds
+    the matching ID, e.g. ``{'note': 'pk', 'report': 'report_id'}``. Views
+    without it fall back to plain SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields = getattr(view, 'fulltext_search', None)
+        terms = self.get_search_terms(request)
+        if not fields or not terms:
+            return super().filter_queryset(request, queryset, view)
+        return search.filter_matching(queryset, ' '.join(terms), fields)
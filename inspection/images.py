@@ -0,0 +1,114 @@
+"""
+Print-resolution image variants for PDF reports.
+
+Attachments are embedded in the report HTML as JPEG data URIs instead of
+letting the PDF engine read the original files from disk. Downsampled
+variants are generated once with Pillow and stored next to the uploads
+(under PDF_IMAGE_VARIANT_DIR), so later renders only read a small file.
+
+Every PDF has an image byte budget (PDF_IMAGE_BYTE_BUDGET): each image
+gets an equal share of what is left and is embedded at the largest
+variant that fits. Images that do not fit even at the smallest size are
+listed by name only.
+"""
+
+import base64
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff', '.webp'}
+
+# Longest side in pixels, tried from largest to smallest while fitting the budget.
+VARIANT_SIZES = (1600, 1200, 800, 500)
+
+
+def is_image(name):
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def variant_name(name, max_dimension, quality):
+    """Storage path of the variant of ``name`` at ``max_dimension`` pixels."""
+    digest = hashlib.sha256(f'{name}:{max_dimension}:{quality}'.encode()).hexdigest()
+    variant_dir = getattr(settings, 'PDF_IMAGE_VARIANT_DIR', 'pdf_variants')
+    return f'{variant_dir}/{digest[:2]}/{digest}.jpg'
+
+
+def make_variant(file, max_dimension, quality):
+    """JPEG bytes of the image in ``file``, at most ``max_dimension`` pixels on its longest side."""
+    with Image.open(file) as image:
+        image.draft('RGB', (max_dimension, max_dimension))  # fast JPEG downscaling on decode
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+        return output.getvalue()
+
+
+def image_variant(field_file, max_dimension, quality=None):
+    """
+    Return the cached variant of an uploaded image, creating it if needed.
+    Returns None when the file is missing or not a readable image.
+    """
+    quality = quality or getattr(settings, 'PDF_IMAGE_QUALITY', 70)
+    name = variant_name(field_file.name, max_dimension, quality)
+    if default_storage.exists(name):
+        with default_storage.open(name, 'rb') as variant:
+            return variant.read()
+
+    try:
+        with field_file.storage.open(field_file.name, 'rb') as original:
+            data = make_variant(original, max_dimension, quality)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    default_storage.save(name, ContentFile(data))
+    return data
+
+
+def embed_attachments(attachments, budget=None):
+    """
+    Prepare attachments for the report template.
+
+    Returns one dict per attachment with ``caption``, ``name`` and
+    ``data_uri`` (None for files that are not embedded) and the total
+    number of image bytes embedded.
+    """
+    if budget is None:
+        budget = getattr(settings, 'PDF_IMAGE_BYTE_BUDGET', 2 * 1024 * 1024)
+    max_dimension = getattr(settings, 'PDF_IMAGE_MAX_DIMENSION', 1200)
+    sizes = [size for size in VARIANT_SIZES if size <= max_dimension] or [max_dimension]
+
+    attachments = list(attachments)
+    images_left = sum(1 for attachment in attachments if attachment.file_path and is_image(attachment.file_path.name))
+    used = 0
+    embedded = []
+    for attachment in attachments:
+        name = (attachment.original_filename or os.path.basename(attachment.file_path.name)) if attachment.file_path else ''
+        entry = {'caption': attachment.caption, 'name': name, 'data_uri': None}
+        embedded.append(entry)
+        if not name or not is_image(name):
+            continue
+
+        share = (budget - used) // images_left
+        images_left -= 1
+        for size in sizes:
+            data = image_variant(attachment.file_path, size)
+            if data is None:
+                break
+            if len(data) <= share:
+                entry['data_uri'] = 'data:image/jpeg;base64,' + base64.b64encode(data).decode('ascii')
+                used += len(data)
+                break
+    return embedded, used
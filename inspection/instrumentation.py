@@ -0,0 +1,289 @@
+"""
+Request instrumentation: SQL query collection, Server-Timing entries,
+per-view latency histograms and N+1 / slow query detection.
+
+Metrics are aggregated in memory per process; each worker reports its own
+numbers at the metrics endpoint.
+"""
+
+import os
+import re
+import threading
+import time
+import traceback
+from contextlib import ExitStack, contextmanager
+
+import django
+from django.conf import settings
+from django.db import connections
+
+# Upper bounds of the histogram buckets; the last bucket catches everything else.
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+# Frames from these locations are not reported as the origin of a query.
+ORM_PATHS = (
+    os.path.join(os.path.dirname(django.__file__), 'db'),
+    __file__,
+)
+LIBRARY_PATHS = (
+    os.path.dirname(django.__file__),
+    os.path.dirname(threading.__file__),
+    os.sep + 'site-packages' + os.sep,
+    os.sep + 'dist-packages' + os.sep,
+    os.path.join(os.path.dirname(__file__), 'middleware.py'),
+)
+
+
+def query_origin():
+    """
+    Return 'file:line in function' for the innermost application frame that
+    led to a query, followed by the innermost library frame outside the ORM
+    when the query was issued from library code (e.g. a serializer field).
+    """
+    via = None
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(ORM_PATHS):
+            continue
+        location = f'{frame.filename}:{frame.lineno} in {frame.name}'
+        if any(path in frame.filename for path in LIBRARY_PATHS):
+            via = via or location
+            continue
+        return f'{location} (via {via})' if via else location
+    return via
+
+
+class QueryCollector:
+    """
+    Execute wrapper that records every SQL statement and its duration.
+
+    With ``capture_origin`` the application frame that issued each query is
+    recorded too; this walks the stack, so it is meant for development and
+    tests only.
+    """
+
+    def __init__(self, capture_origin=False):
+        self.queries = []
+        self.origins = [] if capture_origin else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+            if self.origins is not None:
+                self.origins.append(query_origin())
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+
+@contextmanager
+def collect_queries(collector=None):
+    """Record queries on every configured database while the block runs."""
+    collector = collector or QueryCollector()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(collector))
+        yield collector
+
+
+class NPlusOneError(AssertionError):
+    """Raised when a request repeats the same query template too often."""
+
+
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its template so that queries differing only in
+    parameters compare equal.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def find_repeated_queries(collector, threshold):
+    """
+    Group the collected queries by template and return those executed more
+    than ``threshold`` times, most frequent first.
+    """
+    groups = {}
+    origins = collector.origins or [None] * len(collector.queries)
+    for (sql, duration), origin in zip(collector.queries, origins):
+        template = normalize_sql(sql)
+        group = groups.get(template)
+        if group is None:
+            group = groups[template] = {'template': template, 'count': 0, 'duration': 0.0, 'origins': {}}
+        group['count'] += 1
+        group['duration'] += duration
+        if origin:
+            group['origins'][origin] = group['origins'].get(origin, 0) + 1
+    repeated = [group for group in groups.values() if group['count'] > threshold]
+    for group in repeated:
+        group['origin'] = max(group['origins'], key=group['origins'].get) if group['origins'] else None
+    return sorted(repeated, key=lambda group: group['count'], reverse=True)
+
+
+def find_slow_queries(collector, threshold_ms):
+    """Return (sql, duration, origin) for queries slower than ``threshold_ms``."""
+    origins = collector.origins or [None] * len(collector.queries)
+    return [
+        (sql, duration, origin)
+        for (sql, duration), origin in zip(collector.queries, origins)
+        if duration * 1000 >= threshold_ms
+    ]
+
+
+def describe_repeated_queries(repeated):
+    lines = []
+    for group in repeated:
+        lines.append(f"{group['count']}x ({group['duration'] * 1000:.1f} ms) {group['template'][:300]}")
+        if group['origin']:
+            lines.append(f"    from {group['origin']}")
+    return '\n'.join(lines)
+
+
+@contextmanager
+def assert_max_repeated_queries(threshold=None):
+    """
+    Fail with NPlusOneError if any query template inside the block runs more
+    than ``threshold`` times (default: QUERY_AUDIT_NPLUSONE_THRESHOLD).
+
+        with assert_max_repeated_queries(3):
+            self.client.get('/api/inspection-reports/')
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'QUERY_AUDIT_NPLUSONE_THRESHOLD', 5)
+    with collect_queries(QueryCollector(capture_origin=True)) as collector:
+        yield collector
+    repeated = find_repeated_queries(collector, threshold)
+    if repeated:
+        raise NPlusOneError('Repeated queries detected:\n' + describe_repeated_queries(repeated))
+
+
+def record_timing(request, name, seconds, description=None):
+    """
+    Add an entry to the Server-Timing header of the current response.
+
+    Views use this to report sub-steps such as template rendering.
+    """
+    request = getattr(request, '_request', request)
+    timings = getattr(request, '_server_timings', None)
+    if timings is None:
+        timings = request._server_timings = []
+    timings.append((name, seconds, description))
+
+
+def server_timing_header(timings):
+    entries = []
+    for name, seconds, description in timings:
+        entry = name if seconds is None else f'{name};dur={seconds * 1000:.1f}'
+        if description:
+            entry += ';desc="{}"'.format(str(description).replace('"', "'"))
+        entries.append(entry)
+    return ', '.join(entries)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def as_dict(self):
+        buckets = {f'le_{bound}': count for bound, count in zip(self.bounds, self.counts)}
+        buckets['inf'] = self.counts[-1]
+        return buckets
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.sql_ms = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.response_bytes = 0
+        self.status_codes = {}
+        self.duration = Histogram(DURATION_BUCKETS_MS)
+        self.query_count = Histogram(QUERY_COUNT_BUCKETS)
+
+    def observe(self, duration_ms, sql_ms, queries, response_bytes, status_code):
+        self.requests += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.sql_ms += sql_ms
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.response_bytes += response_bytes or 0
+        self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+        self.duration.observe(duration_ms)
+        self.query_count.observe(queries)
+
+    def as_dict(self):
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'avg_ms': round(self.total_ms / requests, 2),
+            'max_ms': round(self.max_ms, 2),
+            'avg_sql_ms': round(self.sql_ms / requests, 2),
+            'avg_queries': round(self.queries / requests, 2),
+            'max_queries': self.max_queries,
+            'avg_response_bytes': round(self.response_bytes / requests),
+            'status_codes': {str(code): count for code, count in sorted(self.status_codes.items())},
+            'duration_ms_histogram': self.duration.as_dict(),
+            'query_count_histogram': self.query_count.as_dict(),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe per-view aggregation of request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self.started_at = time.time()
+
+    def observe(self, view_name, **values):
+        with self._lock:
+            metrics = self._views.get(view_name)
+            if metrics is None:
+                metrics = self._views[view_name] = ViewMetrics()
+            metrics.observe(**values)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'since': self.started_at,
+                'views': {name: metrics.as_dict() for name, metrics in sorted(self._views.items())},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+            self.started_at = time.time()
+
+
+registry = MetricsRegistry()
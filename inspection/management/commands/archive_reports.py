@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inspection.archive import archive_reports, attachments_path, count_archivable
+
+
+class Command(BaseCommand):
+    help = (
+        'Move inspection reports whose week ended before a cutoff, with their daily data, '
+        'notes and attachment records, into a gzip-compressed JSON Lines file (attachment '
+        'files into a tar next to it) and delete them in short batches with set-based deletes.'
+    )
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group(required=True)
+        cutoff.add_argument('--before', help='Archive reports that ended before this date (YYYY-MM-DD)')
+        cutoff.add_argument('--older-than-days', type=int, help='Archive reports that ended more than N days ago')
+        parser.add_argument(
+            '--output',
+            help='Archive file, appended to if it exists (default: reports-before-<date>.jsonl.gz)'
+        )
+        parser.add_argument('--batch-size', type=int, default=200, help='Reports archived per transaction (default: 200)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                cutoff = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Invalid date format. Use YYYY-MM-DD')
+        else:
+            if options['older_than_days'] < 0:
+                raise CommandError('--older-than-days cannot be negative')
+            cutoff = date.today() - timedelta(days=options['older_than_days'])
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if options['dry_run']:
+            counts = count_archivable(cutoff)
+            summary = ', '.join(f'{count} {table}' for table, count in counts.items())
+            self.stdout.write(self.style.SUCCESS(f'Would archive reports that ended before {cutoff}: {summary}'))
+            return
+
+        output = options['output'] or f'reports-before-{cutoff}.jsonl.gz'
+        archived, deleted, files = archive_reports(cutoff, output, batch_size=options['batch_size'])
+        summary = ', '.join(f'{count} {table}' for table, count in deleted.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} report(s) that ended before {cutoff} to {output} '
+            f'and {files} attachment file(s) to {attachments_path(output)}'
+            + (f'; deleted {summary}' if summary else '')
+        ))
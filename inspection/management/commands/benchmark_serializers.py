@@ -0,0 +1,88 @@
+import time
+from datetime import date, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from inspection.models import (
+    ChecklistItems, DailyInspectionData, Equipment, InspectionReports, Users
+)
+from inspection.serializers import (
+    DailyInspectionDataSerializer, InspectionReportsListSerializer, optimize_queryset, values_reader
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rows/second of the ModelSerializer list path against the '
+        'values() list path, both on querysets optimized the way the list '
+        'endpoints optimize them. Sample data is created in a transaction that '
+        'is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=300, help='Reports to create (default: 300)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is kept (default: 3)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['reports'])
+            cases = [
+                ('daily-inspection-data', DailyInspectionData.objects.order_by('-inspection_date', 'item__sort_order'),
+                 DailyInspectionDataSerializer),
+                ('inspection-reports', InspectionReports.objects.all(), InspectionReportsListSerializer),
+            ]
+            self.stdout.write(f"{'endpoint':<24} {'rows':>7} {'serializer rows/s':>18} {'values rows/s':>14} {'speedup':>8}")
+            for name, queryset, serializer_class in cases:
+                rows = queryset.count()
+                optimized = optimize_queryset(queryset, serializer_class)
+                slow = self.measure(options['repeat'], lambda: serializer_class(optimized.all(), many=True).data)
+                reader = values_reader(serializer_class)
+                fast = self.measure(options['repeat'], lambda: reader.rows(reader.queryset(queryset.all())))
+                self.stdout.write(
+                    f'{name:<24} {rows:>7} {rows / slow:>18.0f} {rows / fast:>14.0f} {slow / fast:>7.1f}x'
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, repeat, build):
+        """Best wall time of building and JSON-rendering the list."""
+        renderer = JSONRenderer()
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            renderer.render(build())
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, reports):
+        items = list(ChecklistItems.objects.all())
+        if not items:
+            items = ChecklistItems.objects.bulk_create(
+                ChecklistItems(item_description=f'Benchmark item {n}', sort_order=n) for n in range(1, 18)
+            )
+            items = list(ChecklistItems.objects.all())
+        equipment = Equipment.objects.create(
+            serial_number='BENCHMARK-EQ', equipment_type='Excavator', model='Benchmark'
+        )
+        operator = Users.objects.create(full_name='Benchmark Operator', role='operator', employee_number='BENCH-OP')
+        supervisor = Users.objects.create(
+            full_name='Benchmark Supervisor', role='supervisor', employee_number='BENCH-SUP'
+        )
+        start = date(2020, 1, 4)
+        report_objects = InspectionReports.objects.bulk_create(
+            InspectionReports(
+                report_number=f'BENCH-{n}', equipment=equipment, operator=operator, supervisor=supervisor,
+                start_date=start + timedelta(weeks=n), end_date=start + timedelta(weeks=n, days=6),
+                working_hours_from=dt_time(8), working_hours_to=dt_time(17),
+            )
+            for n in range(reports)
+        )
+        DailyInspectionData.objects.bulk_create(
+            DailyInspectionData(
+                report=report, item=item, inspection_date=report.start_date + timedelta(days=day),
+                status='good' if (day + item.sort_order) % 6 else 'not_good',
+            )
+            for report in report_objects for item in items for day in range(7)
+        )
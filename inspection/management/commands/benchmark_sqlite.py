@@ -0,0 +1,155 @@
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from ceidu.environment import sqlite_performance_pragmas
+
+SCHEMA = """
+CREATE TABLE daily_inspection_data (
+    inspection_data_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    report_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    inspection_date DATE NOT NULL,
+    status VARCHAR(10) NOT NULL
+);
+CREATE INDEX daily_inspection_data_report_id ON daily_inspection_data (report_id);
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent read/write throughput of SQLite with the default '
+        'settings against SQLITE_PERFORMANCE_MODE (WAL and tuned pragmas)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads (default: 8)')
+        parser.add_argument('--writers', type=int, default=4, help='Concurrent writer threads (default: 4)')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per mode (default: 5)')
+        parser.add_argument('--rows', type=int, default=50000, help='Rows to seed before measuring (default: 50000)')
+        parser.add_argument(
+            '--timeout', type=float, default=5.0,
+            help='Busy timeout in seconds for both modes (default: 5, the Django default)',
+        )
+
+    def handle(self, *args, **options):
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in ('default', 'performance'):
+                path = Path(tmp) / f'{mode}.sqlite3'
+                self.seed(path, options['rows'])
+                results.append((mode, self.run_mode(path, mode, options)))
+
+        self.stdout.write('')
+        self.stdout.write(f"{'mode':<12} {'reads/s':>10} {'writes/s':>10} {'locked':>8} {'p95 write ms':>13}")
+        for mode, result in results:
+            self.stdout.write(
+                f"{mode:<12} {result['reads_per_second']:>10.0f} {result['writes_per_second']:>10.0f} "
+                f"{result['locked']:>8} {result['p95_write_ms']:>13.1f}"
+            )
+
+    def connect(self, path, mode, timeout):
+        """Open a connection the way Django would in the given mode."""
+        connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        if mode == 'performance':
+            for name, value in sqlite_performance_pragmas():
+                # Both modes share --timeout so only the tuning differs.
+                if name != 'busy_timeout':
+                    connection.execute(f'PRAGMA {name}={value}')
+        return connection
+
+    def seed(self, path, rows):
+        connection = sqlite3.connect(path)
+        connection.executescript(SCHEMA)
+        start = date(2024, 1, 1)
+        connection.executemany(
+            'INSERT INTO daily_inspection_data (report_id, item_id, inspection_date, status) VALUES (?, ?, ?, ?)',
+            (
+                (n // 119 + 1, n % 17 + 1, (start + timedelta(days=n % 7)).isoformat(),
+                 'good' if n % 5 else 'not_good')
+                for n in range(rows)
+            ),
+        )
+        connection.commit()
+        connection.close()
+
+    def run_mode(self, path, mode, options):
+        begin = 'BEGIN IMMEDIATE' if mode == 'performance' else 'BEGIN'
+        max_report = max(options['rows'] // 119, 1)
+        stop = threading.Event()
+        lock = threading.Lock()
+        counters = {'reads': 0, 'writes': 0, 'locked': 0}
+        write_times = []
+
+        def reader():
+            connection = self.connect(path, mode, options['timeout'])
+            reads = locked = 0
+            while not stop.is_set():
+                try:
+                    connection.execute(
+                        'SELECT item_id, inspection_date, status FROM daily_inspection_data WHERE report_id = ?',
+                        (random.randint(1, max_report),),
+                    ).fetchall()
+                    reads += 1
+                except sqlite3.OperationalError:
+                    locked += 1
+            connection.close()
+            with lock:
+                counters['reads'] += reads
+                counters['locked'] += locked
+
+        def writer():
+            connection = self.connect(path, mode, options['timeout'])
+            writes = locked = 0
+            times = []
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    connection.execute(begin)
+                    connection.execute(
+                        'INSERT INTO daily_inspection_data (report_id, item_id, inspection_date, status) '
+                        'VALUES (?, ?, ?, ?)',
+                        (random.randint(1, max_report), random.randint(1, 17), '2024-02-01', 'good'),
+                    )
+                    connection.execute('COMMIT')
+                    writes += 1
+                    times.append(time.perf_counter() - started)
+                except sqlite3.OperationalError:
+                    locked += 1
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+            connection.close()
+            with lock:
+                counters['writes'] += writes
+                counters['locked'] += locked
+                write_times.extend(times)
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer) for _ in range(options['writers'])]
+        self.stdout.write(
+            f"Running {mode} mode: {options['readers']} readers, {options['writers']} writers "
+            f"for {options['duration']}s"
+        )
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        write_times.sort()
+        p95 = write_times[int(len(write_times) * 0.95)] * 1000 if write_times else 0.0
+        return {
+            'reads_per_second': counters['reads'] / elapsed,
+            'writes_per_second': counters['writes'] / elapsed,
+            'locked': counters['locked'],
+            'p95_write_ms': p95,
+        }
@@ -0,0 +1,63 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inspection.blobs import blob_name, file_sha256
+from inspection.models import ReportAttachments
+
+
+class Command(BaseCommand):
+    help = (
+        'Move attachment files uploaded before content-addressed storage into it: '
+        'hash each file, keep one stored copy per content and point every '
+        'attachment with that content at it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be moved and freed')
+        parser.add_argument('--batch-size', type=int, default=500, help='Attachments loaded per query (default: 500)')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        attachments = ReportAttachments.objects.filter(content_hash='').exclude(file_path='').order_by('attachment_id')
+        moved = missing = freed_files = freed_bytes = 0
+        seen = set()  # blob names written in a dry run
+
+        for attachment in attachments.iterator(chunk_size=options['batch_size']):
+            storage, old_name = attachment.file_path.storage, attachment.file_path.name
+            try:
+                size = storage.size(old_name)
+                with storage.open(old_name, 'rb') as handle:
+                    content_hash = file_sha256(File(handle))
+            except OSError:
+                missing += 1
+                self.stderr.write(f'Attachment {attachment.pk}: {old_name} is missing')
+                continue
+            name = blob_name(content_hash, old_name)
+
+            duplicate = storage.exists(name) or name in seen
+            if dry_run:
+                seen.add(name)
+            else:
+                with transaction.atomic():
+                    if not storage.exists(name):
+                        with storage.open(old_name, 'rb') as handle:
+                            name = storage.save(name, handle)
+                    ReportAttachments.objects.filter(pk=attachment.pk).update(
+                        file_path=name, content_hash=content_hash,
+                        original_filename=attachment.original_filename or os.path.basename(old_name)[:255],
+                    )
+                    if not ReportAttachments.objects.filter(file_path=old_name).exists():
+                        transaction.on_commit(lambda old_name=old_name: storage.delete(old_name))
+            moved += 1
+            if duplicate:
+                freed_files += 1
+                freed_bytes += size
+
+        verb = 'Would move' if dry_run else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {moved} attachment(s); {freed_files} duplicate file(s), '
+            f'{freed_bytes / (1024 * 1024):.1f} MiB freed; {missing} missing'
+        ))
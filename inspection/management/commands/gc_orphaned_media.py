@@ -0,0 +1,134 @@
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from inspection.images import VARIANT_SIZES, is_image, variant_name
+from inspection.models import RenderedReportPDF, ReportAttachments
+
+
+def scan_files(root, skip=()):
+    """Yield (path, stat) for every regular file under ``root``, using os.scandir."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in skip:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.stat(follow_symlinks=False)
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete or quarantine files under MEDIA_ROOT that no attachment or stored PDF '
+        'refers to (left behind by bulk deletes, failed uploads or older versions). '
+        'PDF image variants of existing attachments are kept.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report orphaned files and their size')
+        parser.add_argument(
+            '--quarantine', metavar='DIR',
+            help='Move orphans into DIR (keeping their relative paths) instead of deleting them'
+        )
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help='Leave files modified more recently than this alone, e.g. uploads in progress (default: 24)'
+        )
+        parser.add_argument('--workers', type=int, default=8, help='Files removed or moved in parallel (default: 8)')
+
+    def referenced_names(self):
+        """Every storage name the database refers to, from one query, plus their PDF image variants."""
+        names = set(
+            ReportAttachments.objects.exclude(file_path='').order_by().values_list('file_path', flat=True).union(
+                RenderedReportPDF.objects.exclude(file='').order_by().values_list('file', flat=True)
+            )
+        )
+        quality = getattr(settings, 'PDF_IMAGE_QUALITY', 70)
+        sizes = set(VARIANT_SIZES) | {getattr(settings, 'PDF_IMAGE_MAX_DIMENSION', 1200)}
+        names |= {
+            variant_name(name, size, quality)
+            for name in list(names) if is_image(name)
+            for size in sizes
+        }
+        return names
+
+    def still_unreferenced(self, names, batch_size=500):
+        """Drop names that gained a reference while the disk was scanned (e.g. a reused blob)."""
+        names = list(names)
+        referenced = set()
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            referenced.update(ReportAttachments.objects.filter(file_path__in=batch).values_list('file_path', flat=True))
+            referenced.update(RenderedReportPDF.objects.filter(file__in=batch).values_list('file', flat=True))
+        return [name for name in names if name not in referenced]
+
+    def handle(self, *args, **options):
+        root = os.path.realpath(settings.MEDIA_ROOT)
+        if not os.path.isdir(root):
+            raise CommandError(f'MEDIA_ROOT does not exist: {root}')
+        quarantine = os.path.realpath(options['quarantine']) if options['quarantine'] else None
+        if quarantine == root:
+            raise CommandError('The quarantine directory cannot be MEDIA_ROOT itself')
+
+        referenced = self.referenced_names()
+        cutoff = time.time() - options['min_age_hours'] * 3600
+        orphans = {}
+        for path, stat in scan_files(root, skip={quarantine} if quarantine else ()):
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            if name not in referenced and stat.st_mtime < cutoff:
+                orphans[name] = stat.st_size
+        orphan_names = self.still_unreferenced(orphans)
+        total_bytes = sum(orphans[name] for name in orphan_names)
+
+        if options['dry_run']:
+            if options['verbosity'] > 1:
+                for name in sorted(orphan_names):
+                    self.stdout.write(f'{orphans[name]:>12}  {name}')
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(orphan_names)} orphaned file(s), {total_bytes / (1024 * 1024):.1f} MiB '
+                f'({len(referenced)} referenced names)'
+            ))
+            return
+
+        def collect(name):
+            source = os.path.join(root, name)
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(source, target)
+            else:
+                os.remove(source)
+            return name
+
+        failed = 0
+        collected = []
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            futures = {executor.submit(collect, name): name for name in orphan_names}
+            for future, name in futures.items():
+                try:
+                    collected.append(future.result())
+                except OSError as e:
+                    failed += 1
+                    self.stderr.write(f'{name}: {e}')
+
+        # Remove directories the orphans leave empty, up to MEDIA_ROOT.
+        for directory in sorted({os.path.dirname(os.path.join(root, name)) for name in collected}, reverse=True):
+            while directory != root and directory.startswith(root + os.sep):
+                try:
+                    os.rmdir(directory)
+                except OSError:  # not empty
+                    break
+                directory = os.path.dirname(directory)
+
+        verb = 'Quarantined' if quarantine else 'Deleted'
+        freed = sum(orphans[name] for name in collected)
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(collected)} orphaned file(s), {freed / (1024 * 1024):.1f} MiB; {failed} failed'
+        ))
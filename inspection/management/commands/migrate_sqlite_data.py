@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers import sort_dependencies
+from django.db import connections, transaction
+
+from inspection.search import rebuild_index
+
+SOURCE_ALIAS = 'sqlite_source'
+
+
+@contextmanager
+def preserve_auto_now(models):
+    """Temporarily disable auto_now/auto_now_add so copied timestamps are kept."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    try:
+        for field in fields:
+            field.auto_now = field.auto_now_add = False
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy all data from an existing SQLite database into the configured '
+        'database (e.g. PostgreSQL). Run "migrate" on the target first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', default=str(settings.BASE_DIR / 'db.sqlite3'),
+            help='Path to the SQLite database to copy from (default: db.sqlite3)',
+        )
+        parser.add_argument(
+            '--database', default='default',
+            help='Target database alias (default: default)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows inserted per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--no-input', action='store_false', dest='interactive',
+            help='Do not ask for confirmation before replacing target data',
+        )
+
+    def handle(self, *args, **options):
+        source = Path(options['source'])
+        target = options['database']
+        batch_size = options['batch_size']
+
+        if not source.is_file():
+            raise CommandError(f'SQLite database not found: {source}')
+        if target not in connections:
+            raise CommandError(f"Unknown database alias '{target}'")
+        if connections[target].vendor == 'sqlite' and \
+                Path(connections[target].settings_dict['NAME']).resolve() == source.resolve():
+            raise CommandError('Source and target are the same database')
+
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings({
+            'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(source)},
+        })['default']
+
+        if options['interactive']:
+            answer = input(
+                f'All data in the "{target}" database will be replaced with the '
+                f'contents of {source}. Continue? [y/N]: '
+            )
+            if answer.lower() != 'y':
+                self.stdout.write(self.style.WARNING('Cancelled'))
+                return
+
+        models = [
+            model for model in sort_dependencies(
+                [(config, None) for config in apps.get_app_configs()], allow_cycles=True
+            )
+            if model._meta.managed and not model._meta.proxy
+        ]
+        # Auto-created many-to-many tables are not part of sort_dependencies.
+        models += [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.auto_created and model._meta.managed and model not in models
+        ]
+
+        try:
+            with transaction.atomic(using=target), preserve_auto_now(models):
+                # Remove rows created by "migrate" (content types, permissions)
+                # so that primary keys can be copied unchanged. Inside the
+                # transaction, so a failed copy leaves the target as it was.
+                call_command('flush', database=target, interactive=False,
+                             inhibit_post_migrate=True, verbosity=0)
+
+                for model in models:
+                    copied = self.copy_model(model, target, batch_size)
+                    if copied:
+                        self.stdout.write(f'Copied {copied} rows into {model._meta.db_table}')
+
+                # Inserting explicit primary keys leaves sequences behind on
+                # PostgreSQL; move them past the copied rows.
+                connection = connections[target]
+                sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+                if sequence_sql:
+                    with connection.cursor() as cursor:
+                        for sql in sequence_sql:
+                            cursor.execute(sql)
+
+                # The copy does not send post_save; index the copied text.
+                indexed = rebuild_index(lambda name: apps.get_model('inspection', name), using=target)
+                self.stdout.write(f'Indexed {indexed} search entries')
+        finally:
+            connections[SOURCE_ALIAS].close()
+            del connections.settings[SOURCE_ALIAS]
+
+        self.stdout.write(self.style.SUCCESS(f'Finished copying {source} into "{target}"'))
+
+    def copy_model(self, model, target, batch_size):
+        """Copy one table in primary key order using batched inserts."""
+        source_table = model._meta.db_table
+        if source_table not in connections[SOURCE_ALIAS].introspection.table_names():
+            self.stdout.write(self.style.WARNING(f'Skipping {source_table}: not present in source'))
+            return 0
+
+        copied = 0
+        batch = []
+        rows = model._base_manager.using(SOURCE_ALIAS).order_by('pk').iterator(chunk_size=batch_size)
+        for obj in rows:
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model._base_manager.using(target).bulk_create(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            model._base_manager.using(target).bulk_create(batch)
+            copied += len(batch)
+        return copied
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from inspection.models import DailyInspectionData
+from inspection.partitions import INTERVALS, TABLE, convert_table, create_partitions, is_partitioned, partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Manage range partitions of daily_inspection_data by inspection date (PostgreSQL). '
+        'Run with --convert month|year once, then regularly from cron to create upcoming partitions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', choices=INTERVALS,
+            help='Replace the table with one partitioned by month or year (locks the table while rows are copied)'
+        )
+        parser.add_argument(
+            '--ahead', type=int, default=3,
+            help='Create partitions for this many months or years after the current one (default: 3)'
+        )
+        parser.add_argument('--list', action='store_true', help='List the partitions and their estimated row counts')
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_write(DailyInspectionData)]
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning requires PostgreSQL')
+        if options['ahead'] < 0:
+            raise CommandError('--ahead cannot be negative')
+
+        partitioned = is_partitioned(connection)
+        if options['convert']:
+            if partitioned:
+                raise CommandError(f'{TABLE} is already partitioned')
+            try:
+                created = convert_table(connection, options['convert'], ahead=options['ahead'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f'Partitioned {TABLE} by {options["convert"]}; created {len(created)} partition(s)'
+            ))
+        elif not partitioned:
+            raise CommandError(f'{TABLE} is not partitioned; run with --convert month or --convert year first')
+        elif not options['list']:
+            try:
+                created = create_partitions(connection, ahead=options['ahead'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            for name in created:
+                self.stdout.write(f'Created {name}')
+            self.stdout.write(self.style.SUCCESS(f'{len(created)} partition(s) created'))
+
+        if options['list']:
+            for name, bounds, rows in partitions(connection):
+                self.stdout.write(f'{name:<40} {bounds:<60} ~{max(rows, 0)} rows')
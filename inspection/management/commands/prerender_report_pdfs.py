@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+from django.http import HttpRequest
+from django.utils.text import get_valid_filename
+
+from inspection.models import InspectionReports, RenderedReportPDF
+from inspection.pdf_engines import PDFRenderError
+from inspection.pdf_views import InspectionReportPDFView, report_content_hash, report_pdf_filename
+
+
+class Command(BaseCommand):
+    help = (
+        'Pre-render PDFs of finished reports so downloads are served from storage. '
+        'Reports whose stored PDF still matches their content are skipped; run it '
+        'from cron, e.g. hourly or every night.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settle-days', type=int, default=1,
+            help='Only render reports whose end_date is at least this many days ago (default: 1)'
+        )
+        parser.add_argument(
+            '--max-age-days', type=int, default=30,
+            help='Skip reports that ended more than this many days ago (default: 30, 0 for no limit)'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='PDFs rendered in parallel (default: PDF_MAX_CONCURRENCY)'
+        )
+        parser.add_argument('--report', type=int, action='append', dest='report_ids', help='Only this report ID (repeatable)')
+        parser.add_argument('--force', action='store_true', help='Render even if the stored PDF is current')
+
+    def handle(self, *args, **options):
+        cutoff = date.today() - timedelta(days=options['settle_days'])
+        reports = InspectionReports.objects.filter(end_date__lte=cutoff).select_related(
+            'equipment', 'operator', 'supervisor', 'rendered_pdf'
+        ).order_by('-end_date', 'report_id')
+        if options['max_age_days']:
+            reports = reports.filter(end_date__gte=date.today() - timedelta(days=options['max_age_days']))
+        if options['report_ids']:
+            reports = reports.filter(report_id__in=options['report_ids'])
+
+        pending = []
+        for report in reports:
+            content_hash = report_content_hash(report)
+            stored = getattr(report, 'rendered_pdf', None)
+            if options['force'] or stored is None or stored.content_hash != content_hash:
+                pending.append((report, content_hash))
+
+        self.stdout.write(f'{len(pending)} report(s) to render')
+        workers = options['workers'] or getattr(settings, 'PDF_MAX_CONCURRENCY', 4)
+        rendered = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.render, report.report_id): (report, content_hash)
+                for report, content_hash in pending
+            }
+            # Files and rows are written from this thread only, one at a time.
+            for future in as_completed(futures):
+                report, content_hash = futures[future]
+                try:
+                    self.store(report, content_hash, future.result())
+                except (PDFRenderError, OSError, SuspiciousFileOperation, DatabaseError) as e:
+                    failed += 1
+                    self.stderr.write(f'Report {report.report_id}: {e}')
+                    continue
+                rendered += 1
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f'Rendered {rendered} PDF(s), {failed} failed'))
+
+    def render(self, report_id):
+        try:
+            view = InspectionReportPDFView()
+            view.setup(HttpRequest(), report_id=report_id)
+            return view.render_pdf(view.get_context_data())
+        finally:
+            connections.close_all()
+
+    def store(self, report, content_hash, pdf):
+        stored = getattr(report, 'rendered_pdf', None) or RenderedReportPDF(report=report)
+        old_name = stored.file.name if stored.file else None
+        # Report numbers may contain characters not allowed in file names, such as '/'.
+        stored.file.save(get_valid_filename(report_pdf_filename(report)), ContentFile(pdf), save=False)
+        stored.content_hash = content_hash
+        try:
+            stored.save()
+        except DatabaseError:
+            stored.file.storage.delete(stored.file.name)
+            raise
+        if old_name and old_name != stored.file.name:
+            stored.file.storage.delete(old_name)
@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from inspection.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the full-text search index of notes, checklist items and report '
+        'numbers, e.g. after bulk imports or changes made outside the ORM.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias (default: default)')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        with transaction.atomic(using=using):
+            total = rebuild_index(lambda name: apps.get_model('inspection', name), using=using)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} entries'))
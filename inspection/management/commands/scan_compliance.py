@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inspection.compliance import scan, scan_week, week_start_of
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare expected and recorded daily checks of every active machine per week '
+        'and store the result in the compliance table. Run it daily from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--weeks', type=int, default=2,
+            help='Scan the current week and the weeks before it, this many in total (default: 2)'
+        )
+        parser.add_argument('--week', help='Scan only the week containing this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        if options['week']:
+            try:
+                day = datetime.strptime(options['week'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Invalid date format. Use YYYY-MM-DD')
+            week_start = week_start_of(day)
+            results = [(week_start, scan_week(week_start))]
+        else:
+            if options['weeks'] < 1:
+                raise CommandError('--weeks must be at least 1')
+            results = scan(options['weeks'])
+
+        for week_start, counts in results:
+            summary = ', '.join(f'{count} {week_status}' for week_status, count in counts.items())
+            self.stdout.write(self.style.SUCCESS(f'Week of {week_start}: {summary}'))
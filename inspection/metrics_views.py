@@ -0,0 +1,28 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema
+
+from .instrumentation import registry
+
+
+@extend_schema(
+    summary='Request Metrics',
+    description=(
+        'Per-view request metrics collected by RequestMetricsMiddleware in this '
+        'worker process: request count, latency, SQL query count and time, '
+        'response size and histograms. DELETE resets the counters.'
+    ),
+    tags=['Monitoring'],
+)
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    """
+    API endpoint exposing aggregated request metrics (staff only)
+    """
+    if request.method == 'DELETE':
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(registry.snapshot(), status=status.HTTP_200_OK)
@@ -0,0 +1,235 @@
+import hashlib
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from .db_routers import activate_read_alias, deactivate_read_alias, replica_alias, uses_replica
+from .instrumentation import (
+    NPlusOneError, QueryCollector, collect_queries, describe_repeated_queries,
+    find_repeated_queries, find_slow_queries, registry, server_timing_header,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+logger = logging.getLogger('inspection.queries')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve safe reads of opted-in views from the read replica.
+
+    After a client makes a successful write, its reads stay on the primary
+    for REPLICA_STICKY_SECONDS so it always sees its own changes even when
+    the replica lags behind.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.alias = replica_alias()
+        if self.alias is None:
+            raise MiddlewareNotUsed('No read replica configured')
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+    def __call__(self, request):
+        request._replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request._replica_token is not None:
+                deactivate_read_alias(request._replica_token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            cache.set(self.pin_key(request), True, self.sticky_seconds)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS and uses_replica(view_func) \
+                and not cache.get(self.pin_key(request)):
+            request._replica_token = activate_read_alias(self.alias)
+        return None
+
+    def pin_key(self, request):
+        """Identify the client by its token, session or address."""
+        identity = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            or request.META.get('REMOTE_ADDR', '')
+        )
+        return 'replica-pin:' + hashlib.sha256(identity.encode()).hexdigest()
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure wall time, SQL query count and time, and response size per request.
+
+    The numbers are sent back in a Server-Timing header (together with any
+    sub-steps views added through record_timing()) and aggregated per
+    resolved view name (the view's dotted path for unnamed URLs) for the
+    metrics endpoint.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed('Request metrics disabled')
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect_queries() as queries:
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        response_bytes = None if response.streaming else len(response.content)
+
+        registry.observe(
+            view_name,
+            duration_ms=duration * 1000,
+            sql_ms=queries.duration * 1000,
+            queries=queries.count,
+            response_bytes=response_bytes,
+            status_code=response.status_code,
+        )
+
+        if self.server_timing:
+            timings = [
+                ('total', duration, None),
+                ('db', queries.duration, f'{queries.count} queries'),
+                ('app', duration - queries.duration, None),
+            ]
+            timings += getattr(request, '_server_timings', [])
+            timings.append(('view', None, view_name))
+            response['Server-Timing'] = server_timing_header(timings)
+        return response
+
+
+class QueryAuditMiddleware:
+    """
+    Detect N+1 query patterns and slow queries per request.
+
+    Queries are grouped by normalized SQL template; a template executed more
+    than QUERY_AUDIT_NPLUSONE_THRESHOLD times is reported together with the
+    application frame that issued it. With QUERY_AUDIT_RAISE (enabled by the
+    test runner) the request fails with NPlusOneError instead of logging.
+    Meant for development and staging: recording the origin walks the stack
+    for every query.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_AUDIT_ENABLED', False):
+            return self.get_response(request)
+
+        with collect_queries(QueryCollector(capture_origin=True)) as collector:
+            response = self.get_response(request)
+
+        threshold = getattr(settings, 'QUERY_AUDIT_NPLUSONE_THRESHOLD', 5)
+        repeated = find_repeated_queries(collector, threshold)
+        if repeated:
+            message = f'Repeated queries in {request.method} {request.path}:\n' + describe_repeated_queries(repeated)
+            if getattr(settings, 'QUERY_AUDIT_RAISE', False):
+                raise NPlusOneError(message)
+            logger.warning(message)
+
+        slow_ms = getattr(settings, 'QUERY_AUDIT_SLOW_MS', 100)
+        for sql, duration, origin in find_slow_queries(collector, slow_ms):
+            logger.warning(
+                'Slow query (%.1f ms) in %s %s from %s: %s',
+                duration * 1000, request.method, request.path, origin, sql[:500],
+            )
+        return response
+
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/xml',
+    'image/svg+xml', 'text/',
+)
+_ACCEPT_ENCODING_ITEM = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def accepted_encodings(header):
+    """Parse an Accept-Encoding header into {coding: q-value}."""
+    encodings = {}
+    for item in header.split(','):
+        match = _ACCEPT_ENCODING_ITEM.fullmatch(item)
+        if not match:
+            continue
+        try:
+            quality = float(match[2]) if match[2] is not None else 1.0
+        except ValueError:
+            continue
+        encodings[match[1].lower()] = quality
+    return encodings
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, negotiated via Accept-Encoding.
+
+    Brotli is used when the brotli package is installed and the client
+    prefers it (or ranks it equal to gzip). Responses smaller than
+    COMPRESSION_MIN_SIZE bytes, streaming and partial responses, and
+    content types that are already compressed (PDFs, images) are left
+    alone. gzip output uses Django's BREACH mitigation like GZipMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not getattr(settings, 'COMPRESSION_ENABLED', True):
+            raise MiddlewareNotUsed('Response compression disabled')
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.status_code != 200 or response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES) or len(response.content) < self.min_size:
+            return response
+
+        coding = self.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding == 'br':
+            compressed = brotli.compress(response.content, quality=self.brotli_quality)
+        elif coding == 'gzip':
+            compressed = compress_string(response.content, max_random_bytes=100)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = coding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def choose_encoding(self, header):
+        encodings = accepted_encodings(header)
+        wildcard = encodings.get('*', 0)
+        br = encodings.get('br', wildcard) if brotli is not None else 0
+        gz = encodings.get('gzip', wildcard)
+        if br > 0 and br >= gz:
+            return 'br'
+        if gz > 0:
+            return 'gzip'
+        return None
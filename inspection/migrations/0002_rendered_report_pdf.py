@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 15:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspection', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedReportPDF',
+            fields=[
+                ('rendered_pdf_id', models.AutoField(primary_key=True, serialize=False)),
+                ('file', models.FileField(help_text='Stored PDF file', upload_to='report_pdfs/')),
+                ('content_hash', models.CharField(help_text='Fingerprint of the report content the PDF was rendered from', max_length=64)),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+                ('report', models.OneToOneField(help_text='The rendered report', on_delete=django.db.models.deletion.CASCADE, related_name='rendered_pdf', to='inspection.inspectionreports')),
+            ],
+            options={
+                'verbose_name': 'Rendered Report PDF',
+                'verbose_name_plural': 'Rendered Report PDFs',
+                'db_table': 'rendered_report_pdfs',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from inspection.search import create_index_table, drop_index_table, rebuild_index
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    create_index_table(connection)
+    rebuild_index(lambda name: apps.get_model('inspection', name), using=connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    drop_index_table(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspection', '0002_rendered_report_pdf'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
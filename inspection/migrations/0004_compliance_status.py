@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-19 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspection', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceStatus',
+            fields=[
+                ('compliance_id', models.AutoField(primary_key=True, serialize=False)),
+                ('week_start', models.DateField(help_text='Monday of the scanned week')),
+                ('expected_cells', models.PositiveIntegerField(help_text='Checklist items times days of the week elapsed at scan time')),
+                ('recorded_cells', models.PositiveIntegerField(help_text='Daily inspection data rows recorded for those days')),
+                ('missing_days', models.PositiveIntegerField(help_text='Elapsed days without any recorded check')),
+                ('failed_cells', models.PositiveIntegerField(help_text='Checks recorded as not_good')),
+                ('status', models.CharField(choices=[('complete', 'Complete'), ('incomplete', 'Incomplete'), ('missing_report', 'Missing Report')], max_length=20)),
+                ('scanned_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Compliance Status',
+                'verbose_name_plural': 'Compliance Statuses',
+                'db_table': 'compliance_status',
+                'ordering': ['-week_start', 'equipment'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='dailyinspectiondata',
+            index=models.Index(fields=['inspection_date'], name='daily_data_date'),
+        ),
+        migrations.AddField(
+            model_name='compliancestatus',
+            name='equipment',
+            field=models.ForeignKey(help_text='Scanned equipment', on_delete=django.db.models.deletion.CASCADE, related_name='compliance', to='inspection.equipment'),
+        ),
+        migrations.AddField(
+            model_name='compliancestatus',
+            name='report',
+            field=models.ForeignKey(blank=True, help_text='Latest report covering the week, if any', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inspection.inspectionreports'),
+        ),
+        migrations.AddIndex(
+            model_name='compliancestatus',
+            index=models.Index(fields=['week_start', 'status'], name='compliance_week_status'),
+        ),
+        migrations.AddConstraint(
+            model_name='compliancestatus',
+            constraint=models.UniqueConstraint(fields=('equipment', 'week_start'), name='compliance_equipment_week'),
+        ),
+    ]
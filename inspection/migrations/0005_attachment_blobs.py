@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 15:45
+
+import inspection.blobs
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspection', '0004_compliance_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportattachments',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='SHA-256 of the file; attachments with the same content share one stored file', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='reportattachments',
+            name='original_filename',
+            field=models.CharField(blank=True, help_text='Name of the file as uploaded', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='reportattachments',
+            name='file_path',
+            field=models.FileField(help_text='Server path or URL to the stored image/file', max_length=255, upload_to=inspection.blobs.attachment_upload_to),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from inspection.search import backend, rebuild_index
+
+
+def rekey_search_index(apps, schema_editor):
+    # FTS5 entries are now keyed by a rowid derived from kind and object_id.
+    connection = schema_editor.connection
+    if backend(connection) == 'fts5':
+        rebuild_index(lambda name: apps.get_model('inspection', name), using=connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspection', '0005_attachment_blobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspection', '0006_search_index_rowids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='compliancestatus',
+            name='week_start',
+            field=models.DateField(help_text='First day of the scanned week (COMPLIANCE_WEEK_START)'),
+        ),
+    ]
@@ -0,0 +1,121 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .serializers import optimize_queryset, serializer_fields, values_reader
+
+
+def _query_list(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+class ValuesListMixin:
+    """
+    Serve list actions from ``.values_list()`` rows.
+
+    The response has the same fields as the viewset's serializer (see
+    serializers.ValuesReader); serializers the reader cannot represent fall
+    back to the regular ModelSerializer path.
+    """
+
+    def get_response_serializer_class(self):
+        return self.get_serializer_class()
+
+    def get_response_fields(self):
+        """Field names to render, or None for all of them."""
+        return None
+
+    def list(self, request, *args, **kwargs):
+        reader = values_reader(self.get_response_serializer_class(), self.get_response_fields())
+        if not reader.supported:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(reader.queryset(queryset))
+        if page is not None:
+            return self.get_paginated_response(reader.rows(page, request))
+        return Response(reader.rows(reader.queryset(queryset), request))
+
+    def values_response(self, queryset):
+        """Unpaginated values() response for custom list actions."""
+        reader = values_reader(self.get_response_serializer_class(), self.get_response_fields())
+        if not reader.supported:
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+        return Response(reader.rows(reader.queryset(queryset), self.request))
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=`` and ``?expand=`` query parameters for read requests.
+
+    ``fields`` is a comma separated list of field names to return.
+    ``expand`` names nested relations to include; they come from
+    ``expanded_serializer_class`` when the viewset sets one (e.g. the
+    detail serializer of a list endpoint). Without ``fields``, expanding
+    returns the plain fields of the action's serializer plus the expanded
+    relations. The queryset only selects the columns and joins the
+    requested fields need and prefetches nothing that is not rendered.
+    """
+    expanded_serializer_class = None
+
+    def _sparse_request(self):
+        request = getattr(self, 'request', None)
+        return request is not None and request.method in SAFE_METHODS
+
+    def get_response_serializer_class(self):
+        if self._sparse_request() and self.expanded_serializer_class is not None \
+                and self.request.query_params.get('expand'):
+            return self.expanded_serializer_class
+        return self.get_serializer_class()
+
+    def get_response_fields(self):
+        """Validated names requested with ``fields``/``expand``, or None for all."""
+        if hasattr(self, '_response_fields'):
+            return self._response_fields
+        fields = None
+        if self._sparse_request():
+            requested = _query_list(self.request.query_params.get('fields'))
+            expand = _query_list(self.request.query_params.get('expand'))
+            if requested or expand:
+                fields = self._validate_response_fields(requested, expand)
+        self._response_fields = fields
+        return fields
+
+    def _validate_response_fields(self, requested, expand):
+        available, nested = serializer_fields(self.get_response_serializer_class())
+        errors = {}
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            errors['fields'] = [f"Unknown field: {name}" for name in unknown]
+        not_nested = [name for name in expand if name not in nested]
+        if not_nested:
+            errors['expand'] = [f"Cannot expand: {name}" for name in not_nested]
+        if errors:
+            raise ValidationError(errors)
+
+        if not requested:
+            base, base_nested = serializer_fields(self.get_serializer_class())
+            requested = [name for name in base if name not in base_nested]
+        return frozenset(requested) | frozenset(expand)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Custom detail actions load their object for other purposes.
+        if not self._sparse_request() or (getattr(self, 'detail', False) and self.action != 'retrieve'):
+            return queryset
+        return optimize_queryset(queryset, self.get_response_serializer_class(), self.get_response_fields())
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_response_fields()
+        if fields is None:
+            return super().get_serializer(*args, **kwargs)
+
+        kwargs.setdefault('context', self.get_serializer_context())
+        serializer = self.get_response_serializer_class()(*args, **kwargs)
+        target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+        for name in list(target.fields):
+            if name not in fields:
+                target.fields.pop(name)
+        return serializer
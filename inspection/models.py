@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .blobs import attachment_upload_to
+
 
 class Equipment(models.Model):
     """Table to store information about each piece of equipment."""
@@ -111,6 +113,9 @@ class DailyInspectionData(models.Model):
         verbose_name_plural = 'Daily Inspection Data'
         unique_together = ['report', 'item', 'inspection_date']
         ordering = ['inspection_date', 'item__sort_order']
+        indexes = [
+            models.Index(fields=['inspection_date'], name='daily_data_date'),
+        ]
     
     def __str__(self):
         return f"{self.report.report_number} - {self.item.item_description} ({self.inspection_date}): {self.status}"
@@ -139,10 +144,18 @@ class ReportAttachments(models.Model):
     
     attachment_id = models.AutoField(primary_key=True)
     report = models.ForeignKey(InspectionReports, on_delete=models.CASCADE, help_text="Links to the inspection report")
-    file_path = models.FileField(upload_to='inspection_attachments/%Y/%m/%d/', help_text="Server path or URL to the stored image/file")
+    file_path = models.FileField(upload_to=attachment_upload_to, max_length=255, help_text="Server path or URL to the stored image/file")
+    original_filename = models.CharField(max_length=255, blank=True, help_text="Name of the file as uploaded")
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False, help_text="SHA-256 of the file; attachments with the same content share one stored file")
     caption = models.CharField(max_length=200, blank=True, null=True, help_text="Optional description of the attachment")
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    def save(self, *args, **kwargs):
+        # Reusing a stored blob locks an attachment that shares it until this
+        # row is committed (see signals.deduplicate_attachment).
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+            super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'report_attachments'
         verbose_name = 'Report Attachment'
@@ -150,4 +163,58 @@ class ReportAttachments(models.Model):
         ordering = ['uploaded_at']
     
     def __str__(self):
-        return f"Attachment for {self.report.report_number}: {self.file_path.name}"
+        return f"Attachment for {self.report.report_number}: {self.original_filename or self.file_path.name}"
+
+
+class RenderedReportPDF(models.Model):
+    """Pre-rendered PDF of a finished report, served while its content hash still matches."""
+    
+    rendered_pdf_id = models.AutoField(primary_key=True)
+    report = models.OneToOneField(InspectionReports, on_delete=models.CASCADE, related_name='rendered_pdf', help_text="The rendered report")
+    file = models.FileField(upload_to='report_pdfs/', help_text="Stored PDF file")
+    content_hash = models.CharField(max_length=64, help_text="Fingerprint of the report content the PDF was rendered from")
+    rendered_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'rendered_report_pdfs'
+        verbose_name = 'Rendered Report PDF'
+        verbose_name_plural = 'Rendered Report PDFs'
+    
+    def __str__(self):
+        return f"PDF for {self.report_id} ({self.rendered_at:%Y-%m-%d %H:%M})"
+
+
+class ComplianceStatus(models.Model):
+    """Expected vs. recorded daily checks of one active machine in one week (see compliance.py)."""
+    
+    STATUS_CHOICES = [
+        ('complete', 'Complete'),
+        ('incomplete', 'Incomplete'),
+        ('missing_report', 'Missing Report'),
+    ]
+    
+    compliance_id = models.AutoField(primary_key=True)
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='compliance', help_text="Scanned equipment")
+    week_start = models.DateField(help_text="First day of the scanned week (COMPLIANCE_WEEK_START)")
+    report = models.ForeignKey(InspectionReports, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', help_text="Latest report covering the week, if any")
+    expected_cells = models.PositiveIntegerField(help_text="Checklist items times days of the week elapsed at scan time")
+    recorded_cells = models.PositiveIntegerField(help_text="Daily inspection data rows recorded for those days")
+    missing_days = models.PositiveIntegerField(help_text="Elapsed days without any recorded check")
+    failed_cells = models.PositiveIntegerField(help_text="Checks recorded as not_good")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    scanned_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'compliance_status'
+        verbose_name = 'Compliance Status'
+        verbose_name_plural = 'Compliance Statuses'
+        ordering = ['-week_start', 'equipment']
+        constraints = [
+            models.UniqueConstraint(fields=['equipment', 'week_start'], name='compliance_equipment_week'),
+        ]
+        indexes = [
+            models.Index(fields=['week_start', 'status'], name='compliance_week_status'),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipment_id} week of {self.week_start}: {self.status}"
@@ -0,0 +1,221 @@
+"""
+Optional range partitioning of ``daily_inspection_data`` by inspection
+date (PostgreSQL only).
+
+``convert_table()`` replaces the table with one partitioned by
+``inspection_date`` into monthly or yearly partitions:
+
+- ``daily_inspection_data_p2025_09`` (month) or ``daily_inspection_data_p2025``
+  (year), plus ``daily_inspection_data_default`` for dates outside them;
+- the rows are copied and the constraints and indexes recreated on the
+  partitioned table, the primary key as (inspection_data_id,
+  inspection_date) because it must contain the partition key;
+- IDs keep coming from a sequence owned by the column, as before.
+
+It runs in one transaction holding an exclusive lock on the table, so
+plan a maintenance window for large tables. ``create_partitions()`` adds
+the partitions of upcoming months or years; rows that landed in the
+default partition for that range are moved into the new partition.
+
+Queries that filter on ``inspection_date`` only read the partitions of
+the requested range (partition pruning): the date filters of the daily
+data endpoints, timelines, compliance scans and the PDF builders, which
+bound daily data by the weeks of the reports they render.
+"""
+
+import re
+from datetime import date
+
+from django.db import transaction
+
+from .models import DailyInspectionData
+
+TABLE = DailyInspectionData._meta.db_table
+KEY = 'inspection_date'
+ID = DailyInspectionData._meta.pk.column
+SEQUENCE = f'{TABLE}_{ID}_seq'
+DEFAULT_PARTITION = f'{TABLE}_default'
+INTERVALS = ('month', 'year')
+
+_PARTITION_NAMES = {
+    'month': re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$'),
+    'year': re.compile(rf'^{TABLE}_p(\d{{4}})$'),
+}
+
+
+def partition_start(day, interval):
+    return day.replace(day=1) if interval == 'month' else day.replace(month=1, day=1)
+
+
+def next_start(start, interval):
+    if interval == 'year':
+        return start.replace(year=start.year + 1)
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+
+def partition_name(start, interval):
+    return f'{TABLE}_p{start:%Y_%m}' if interval == 'month' else f'{TABLE}_p{start:%Y}'
+
+
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLE])
+        return cursor.fetchone() is not None
+
+
+def partitions(connection):
+    """(name, bounds, estimated rows) of every partition, by name."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint '
+            'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname',
+            [TABLE],
+        )
+        return cursor.fetchall()
+
+
+def partition_interval(connection):
+    """'month' or 'year' from the names of the existing partitions, or None."""
+    for name, _, _ in partitions(connection):
+        for interval, pattern in _PARTITION_NAMES.items():
+            if pattern.match(name):
+                return interval
+    return None
+
+
+def _create_partition(cursor, connection, start, interval):
+    """
+    Create the partition starting at ``start`` unless it exists, moving
+    matching rows out of the default partition. Returns the name if created.
+    """
+    name = partition_name(start, interval)
+    cursor.execute('SELECT to_regclass(%s)', [name])
+    if cursor.fetchone()[0] is not None:
+        return None
+    qn = connection.ops.quote_name
+    bounds = f"'{start.isoformat()}'", f"'{next_start(start, interval).isoformat()}'"
+    in_range = f'{qn(KEY)} >= {bounds[0]} AND {qn(KEY)} < {bounds[1]}'
+    cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS)')
+    cursor.execute('SELECT to_regclass(%s)', [DEFAULT_PARTITION])
+    if cursor.fetchone()[0] is not None:
+        cursor.execute(f'INSERT INTO {qn(name)} SELECT * FROM {qn(DEFAULT_PARTITION)} WHERE {in_range}')
+        cursor.execute(f'DELETE FROM {qn(DEFAULT_PARTITION)} WHERE {in_range}')
+    cursor.execute(f'ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} FOR VALUES FROM ({bounds[0]}) TO ({bounds[1]})')
+    return name
+
+
+def create_partitions(connection, ahead=3, today=None):
+    """Create the partitions of the current and the next ``ahead`` months or years; returns the names created."""
+    interval = partition_interval(connection)
+    if interval is None:
+        raise ValueError(f'{TABLE} has no monthly or yearly partitions')
+    start = partition_start(today or date.today(), interval)
+    created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for _ in range(ahead + 1):
+            name = _create_partition(cursor, connection, start, interval)
+            if name:
+                created.append(name)
+            start = next_start(start, interval)
+    return created
+
+
+def _blockers(cursor):
+    """
+    Constraints and indexes the partitioned table could not carry: unique
+    ones without the partition key (other than the primary key, which gets
+    it added) and foreign keys from other tables pointing at this one.
+    """
+    cursor.execute(
+        "SELECT c.conname FROM pg_constraint c "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attname = %s "
+        "WHERE c.conrelid = to_regclass(%s) AND c.contype IN ('u', 'x') AND NOT a.attnum = ANY(c.conkey) "
+        "UNION ALL "
+        "SELECT c.conname FROM pg_constraint c WHERE c.confrelid = to_regclass(%s) AND c.contype = 'f' "
+        "UNION ALL "
+        "SELECT i.indexrelid::regclass::text FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attname = %s "
+        "WHERE i.indrelid = to_regclass(%s) AND i.indisunique AND NOT i.indisprimary "
+        "AND NOT a.attnum = ANY(i.indkey::int2[]) "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)",
+        [KEY, TABLE, TABLE, KEY, TABLE],
+    )
+    return sorted(row[0] for row in cursor.fetchall())
+
+
+def convert_table(connection, interval, ahead=3, today=None):
+    """
+    Replace the table with one partitioned by ``interval``; returns the
+    partitions created. Raises ValueError, before changing anything, if a
+    constraint or index cannot be recreated on the partitioned table.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f'interval must be one of {", ".join(INTERVALS)}')
+    qn = connection.ops.quote_name
+    old_table = f'{TABLE}_unpartitioned'
+    today = today or date.today()
+    created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {qn(TABLE)} IN ACCESS EXCLUSIVE MODE')
+        # Deferred foreign key checks still pending on the table would block dropping it.
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        blockers = _blockers(cursor)
+        if blockers:
+            raise ValueError(
+                f'{TABLE} cannot be partitioned by {KEY}: {", ".join(blockers)} would have to include it '
+                f'or stop referencing the table'
+            )
+        # Definitions to recreate on the new table, read while they still name it.
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f', 'c') ORDER BY contype DESC, conname",
+            [TABLE],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            'SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i WHERE i.indrelid = to_regclass(%s) '
+            'AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)',
+            [TABLE],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'SELECT MIN({qn(KEY)}), MAX({qn(KEY)}), MAX({qn(ID)}) FROM {qn(TABLE)}')
+        first_day, last_day, last_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(old_table)}')
+        cursor.execute(
+            f'CREATE TABLE {qn(TABLE)} (LIKE {qn(old_table)} INCLUDING DEFAULTS) PARTITION BY RANGE ({qn(KEY)})'
+        )
+        # A copied serial default still depends on the old table's sequence.
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} ALTER COLUMN {qn(ID)} DROP DEFAULT')
+        cursor.execute(f'CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(TABLE)} DEFAULT')
+        start = partition_start(min(first_day or today, today), interval)
+        end = partition_start(max(last_day or today, today), interval)
+        for _ in range(ahead):
+            end = next_start(end, interval)
+        while start <= end:
+            name = _create_partition(cursor, connection, start, interval)
+            if name:
+                created.append(name)
+            start = next_start(start, interval)
+
+        cursor.execute(f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(old_table)}')
+        cursor.execute(f'DROP TABLE {qn(old_table)}')
+
+        # The old sequence is dropped with the table unless nothing owned it.
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {qn(SEQUENCE)}')
+        cursor.execute(f'ALTER SEQUENCE {qn(SEQUENCE)} OWNED BY {qn(TABLE)}.{qn(ID)}')
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ALTER COLUMN {qn(ID)} SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute('SELECT setval(%s, %s, false)', [SEQUENCE, (last_id or 0) + 1])
+
+        for name, kind, definition in constraints:
+            if kind == 'p':
+                # A primary key of a partitioned table must include the partition key.
+                definition = f'PRIMARY KEY ({qn(ID)}, {qn(KEY)})'
+            cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}')
+        for definition in indexes:
+            cursor.execute(definition)
+        cursor.execute(f'ANALYZE {qn(TABLE)}')
+    return created
@@ -0,0 +1,245 @@
+"""
+HTML-to-PDF engines.
+
+Two engines are available:
+
+- ``wkhtmltopdf`` runs the binary with the HTML on stdin and the PDF on
+  stdout (no temporary files), killing it when it exceeds the timeout.
+- ``weasyprint`` renders in Python, for hosts without the binary. Its
+  renders run in a pool of long-lived worker processes that load the
+  library and fonts once at start-up, so a request only pays for layout.
+
+``get_renderer()`` builds the renderer for the engine configured by
+PDF_ENGINE; it limits the number of PDFs rendered at the same time per
+process (PDF_MAX_CONCURRENCY);
+requests that cannot get a slot within PDF_RENDER_TIMEOUT seconds fail with
+PDFBusyError instead of piling up.
+"""
+
+import multiprocessing
+import shutil
+import subprocess
+import threading
+
+from django.conf import settings
+
+
+class PDFRenderError(Exception):
+    """The engine failed or timed out."""
+
+
+class PDFBusyError(PDFRenderError):
+    """All rendering slots stayed busy for longer than the timeout."""
+
+
+class WkhtmltopdfEngine:
+    name = 'wkhtmltopdf'
+    in_process = False
+
+    def __init__(self, command='wkhtmltopdf'):
+        self.command = command
+
+    @staticmethod
+    def available(command='wkhtmltopdf'):
+        return shutil.which(command) is not None
+
+    @staticmethod
+    def arguments(options):
+        """{'page-size': 'A4', 'no-outline': None} -> ['--page-size', 'A4', '--no-outline']"""
+        args = []
+        for name, value in options.items():
+            args.append(f'--{name}')
+            if value is not None:
+                args.append(str(value))
+        return args
+
+    def warm_up(self):
+        pass
+
+    def render(self, html, options=None, base_url=None, timeout=None):
+        args = [self.command, '--quiet', *self.arguments(options or {}), '-', '-']
+        try:
+            result = subprocess.run(args, input=html.encode('utf-8'), capture_output=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise PDFRenderError(f'wkhtmltopdf did not finish within {timeout} seconds')
+        except OSError as e:
+            raise PDFRenderError(f'Could not run {self.command}: {e}')
+        # wkhtmltopdf exits with 1 when a resource failed to load but still
+        # writes the document; only a missing PDF is an error.
+        if not result.stdout.startswith(b'%PDF'):
+            raise PDFRenderError(
+                f'wkhtmltopdf exited with {result.returncode}: '
+                f'{result.stderr.decode("utf-8", "replace").strip()[-500:]}'
+            )
+        return result.stdout
+
+
+class WeasyPrintEngine:
+    name = 'weasyprint'
+    in_process = True
+
+    @staticmethod
+    def available():
+        try:
+            import weasyprint  # noqa: F401
+        except (ImportError, OSError):  # OSError: missing Pango libraries
+            return False
+        return True
+
+    @staticmethod
+    def page_css(options):
+        """Translate the wkhtmltopdf page options into an @page rule."""
+        size = options.get('page-size', 'A4')
+        orientation = options.get('orientation', 'Portrait').lower()
+        margins = ' '.join(
+            str(options.get(f'margin-{side}', '0.5in')) for side in ('top', 'right', 'bottom', 'left')
+        )
+        return f'@page {{ size: {size} {orientation}; margin: {margins}; }}'
+
+    def warm_up(self):
+        # Importing WeasyPrint and loading fonts takes longer than laying
+        # out a report; do it before the first request arrives.
+        self.render('<p>warm-up</p>')
+
+    def render(self, html, options=None, base_url=None, timeout=None):
+        from weasyprint import CSS, HTML
+
+        return HTML(string=html, base_url=base_url).write_pdf(
+            stylesheets=[CSS(string=self.page_css(options or {}))]
+        )
+
+
+ENGINES = {
+    WkhtmltopdfEngine.name: WkhtmltopdfEngine,
+    WeasyPrintEngine.name: WeasyPrintEngine,
+}
+
+
+def create_engine(name=None):
+    """Instantiate the engine configured by PDF_ENGINE (or ``name``)."""
+    name = name or getattr(settings, 'PDF_ENGINE', 'auto')
+    command = getattr(settings, 'WKHTMLTOPDF_CMD', 'wkhtmltopdf')
+    if name == 'auto':
+        if WkhtmltopdfEngine.available(command):
+            name = WkhtmltopdfEngine.name
+        elif WeasyPrintEngine.available():
+            name = WeasyPrintEngine.name
+        else:
+            raise PDFRenderError('No PDF engine available: install wkhtmltopdf or the weasyprint package')
+    if name not in ENGINES:
+        raise PDFRenderError(f'Unknown PDF engine: {name}')
+    if name == WkhtmltopdfEngine.name:
+        return WkhtmltopdfEngine(command)
+    return ENGINES[name]()
+
+
+# State of a pool worker process.
+_worker_engine = None
+
+
+def _start_worker(name):
+    global _worker_engine
+    _worker_engine = ENGINES[name]()
+    _worker_engine.warm_up()
+
+
+def _render_in_worker(html, options, base_url):
+    return _worker_engine.render(html, options, base_url)
+
+
+class WorkerPool:
+    """
+    Long-lived worker processes for engines that render in Python.
+
+    Workers are spawned (not forked) on first use so they do not inherit
+    the web process's threads and database connections. A render that
+    exceeds the timeout retires the pool it ran in: later renders go to a
+    new pool, and the old one is terminated, ending the hung worker, once
+    the renders already running in it have reached their own timeouts.
+    """
+
+    def __init__(self, engine_name, size, max_tasks_per_worker=None):
+        self.engine_name = engine_name
+        self.size = size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context('spawn')
+                self._pool = context.Pool(
+                    self.size, initializer=_start_worker, initargs=(self.engine_name,),
+                    maxtasksperchild=self.max_tasks_per_worker,
+                )
+            return self._pool
+
+    def render(self, html, options=None, base_url=None, timeout=None):
+        pool = self._get_pool()
+        result = pool.apply_async(_render_in_worker, (html, options, base_url))
+        try:
+            return result.get(timeout)
+        except multiprocessing.TimeoutError:
+            self._retire(pool, timeout)
+            raise PDFRenderError(f'PDF rendering did not finish within {timeout} seconds')
+
+    def _retire(self, pool, grace):
+        with self._lock:
+            if self._pool is not pool:
+                return  # already retired by another timed-out render
+            self._pool = None
+        pool.close()
+        reaper = threading.Timer(grace, pool.terminate)
+        reaper.daemon = True
+        reaper.start()
+
+    def terminate(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+
+class PDFRenderer:
+    """Engine plus concurrency limit and, for in-process engines, a worker pool."""
+
+    def __init__(self, engine, pool_size=0, max_concurrency=4, timeout=60, max_tasks_per_worker=None):
+        self.engine = engine
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.pool = None
+        if engine.in_process and pool_size > 0:
+            self.pool = WorkerPool(engine.name, pool_size, max_tasks_per_worker)
+
+    @property
+    def name(self):
+        return self.engine.name
+
+    def render(self, html, options=None, base_url=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PDFBusyError('All PDF rendering slots are busy')
+        try:
+            target = self.pool or self.engine
+            return target.render(html, options, base_url=base_url, timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer():
+    """The process-wide PDFRenderer built from settings."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = PDFRenderer(
+                create_engine(),
+                pool_size=getattr(settings, 'PDF_POOL_SIZE', 2),
+                max_concurrency=getattr(settings, 'PDF_MAX_CONCURRENCY', 4),
+                timeout=getattr(settings, 'PDF_RENDER_TIMEOUT', 60),
+                max_tasks_per_worker=getattr(settings, 'PDF_WORKER_MAX_TASKS', 200) or None,
+            )
+        return _renderer
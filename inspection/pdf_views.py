@@ -1,22 +1,52 @@
+import hashlib
+import logging
+import os
+import time
+from functools import lru_cache
+
+from django.conf import settings
+
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
 from django.template.loader import get_template
-from wkhtmltopdf.views import PDFTemplateView
+from django.utils.http import content_disposition_header
+from django.views.generic import TemplateView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from datetime import datetime, timedelta
-from .models import InspectionReports, DailyInspectionData, ChecklistItems
+from .db_routers import replica_read
+from .downloads import serve_file
+from .images import embed_attachments
+from .instrumentation import record_timing
+from .pdf_engines import PDFBusyError, PDFRenderError, get_renderer
+from .models import (
+    InspectionReports, DailyInspectionData, ChecklistItems, ReportNotes, ReportAttachments, RenderedReportPDF
+)
+from .utils import parse_id_list
+
+logger = logging.getLogger('inspection.pdf')
 
 
-class InspectionReportPDFView(PDFTemplateView):
+# The report form has one column per weekday.
+MATRIX_DAYS = 7
+
+# Marks used on the paper form: "/" good, "✓" not good.
+STATUS_SYMBOLS = {'good': '/', 'not_good': '✓'}
+
+
+class InspectionReportPDFView(TemplateView):
     """
     Generate PDF report for inspection reports
+
+    The template is rendered to HTML and converted by the configured PDF
+    engine (see pdf_engines.py); `cmd_options` are wkhtmltopdf options and
+    also set the page size and margins for WeasyPrint.
     """
     template_name = 'inspection/inspection_report.html'
-    filename = 'inspection_report.pdf'
+    read_from_replica = True
     
     cmd_options = {
         'page-size': 'A4',
@@ -27,7 +57,6 @@ class InspectionReportPDFView(PDFTemplateView):
         'encoding': 'UTF-8',
         'orientation': 'Portrait',
         'no-outline': None,
-        'enable-local-file-access': None,
     }
     
     def get_context_data(self, **kwargs):
@@ -35,42 +64,40 @@ class InspectionReportPDFView(PDFTemplateView):
         
         # Get the report
         report_id = self.kwargs.get('report_id')
-        report = get_object_or_404(InspectionReports, report_id=report_id)
+        report = self.report = get_object_or_404(
+            InspectionReports.objects.select_related('equipment', 'operator', 'supervisor'), report_id=report_id
+        )
         
         # Get all checklist items ordered by sort_order
-        checklist_items = ChecklistItems.objects.all().order_by('sort_order')
+        checklist_items = list(ChecklistItems.objects.all().order_by('sort_order'))
         
         # Create date range for the week
-        current_date = report.start_date
-        dates = []
-        while current_date <= report.end_date:
-            dates.append(current_date)
-            current_date += timedelta(days=1)
+        dates = report_dates(report)
         
-        # Get daily inspection data organized by item and date
-        daily_data = DailyInspectionData.objects.filter(report=report)
+        # Status of every (item, date) of the report, read with one query
+        statuses = daily_statuses([report])
         
-        # Create a matrix of inspection data
-        inspection_matrix = {}
+        # Matrix rows for the template: one symbol per day, padded to a full week
+        rows = []
         for item in checklist_items:
-            inspection_matrix[item.item_id] = {}
-            for date in dates:
-                # Find the inspection data for this item and date
-                try:
-                    data = daily_data.get(item=item, inspection_date=date)
-                    inspection_matrix[item.item_id][date] = data.status
-                except DailyInspectionData.DoesNotExist:
-                    inspection_matrix[item.item_id][date] = None
+            cells = [
+                STATUS_SYMBOLS.get(statuses.get((report.report_id, item.item_id, date)), '')
+                for date in dates[:MATRIX_DAYS]
+            ]
+            cells += [''] * (MATRIX_DAYS - len(cells))
+            rows.append({'item': item, 'cells': cells})
         
-        # Get notes and attachments
+        # Get notes and attachments; images are embedded as downsampled data URIs
         notes = report.reportnotes_set.all().order_by('created_at')
-        attachments = report.reportattachments_set.all().order_by('uploaded_at')
+        started = time.perf_counter()
+        attachments, image_bytes = embed_attachments(report.reportattachments_set.all().order_by('uploaded_at'))
+        record_timing(self.request, 'images', time.perf_counter() - started, f'{image_bytes} bytes')
         
         context.update({
             'report': report,
             'checklist_items': checklist_items,
             'dates': dates,
-            'inspection_matrix': inspection_matrix,
+            'rows': rows,
             'notes': notes,
             'attachments': attachments,
             'date_headers': [date.strftime('%A\n%d/%m') for date in dates],
@@ -80,9 +107,103 @@ class InspectionReportPDFView(PDFTemplateView):
         return context
     
     def get_filename(self):
-        report_id = self.kwargs.get('report_id')
-        report = get_object_or_404(InspectionReports, report_id=report_id)
-        return f'inspection_report_{report.report_number}_{report.start_date}.pdf'
+        return report_pdf_filename(self.report)
+
+    def get(self, request, *args, **kwargs):
+        stored = prerendered_pdf(self.kwargs.get('report_id'))
+        if stored is not None:
+            record_timing(request, 'pdf', None, 'prerendered')
+            return serve_file(request, stored.file, filename=stored.filename, content_type='application/pdf')
+        return super().get(request, *args, **kwargs)
+
+    def render_pdf(self, context, base_url=None):
+        """Render the template with ``context`` and convert it to PDF bytes."""
+        started = time.perf_counter()
+        template = get_template(self.template_name)
+        # Part of the fragment cache keys, so fragments cached from an older
+        # version of the template are not reused after it changes.
+        context['template_version'] = os.stat(template.origin.name).st_mtime_ns
+        html = template.render(context, self.request)
+        record_timing(self.request, 'template', time.perf_counter() - started)
+
+        renderer = get_renderer()
+        started = time.perf_counter()
+        pdf = renderer.render(html, self.cmd_options, base_url=base_url)
+        record_timing(self.request, 'pdf', time.perf_counter() - started, renderer.name)
+        return pdf
+
+    def render_to_response(self, context, **response_kwargs):
+        try:
+            pdf = self.render_pdf(context, base_url=self.request.build_absolute_uri('/'))
+        except PDFBusyError:
+            response = HttpResponse('PDF rendering is busy, please retry shortly.', status=503, content_type='text/plain')
+            response['Retry-After'] = '5'
+            return response
+        except PDFRenderError as e:
+            logger.error('Rendering the PDF of report %s failed: %s', self.kwargs.get('report_id'), e)
+            return HttpResponse('The PDF could not be rendered.', status=502, content_type='text/plain')
+
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = content_disposition_header(True, self.get_filename())
+        return response
+
+
+def report_pdf_filename(report):
+    return f'inspection_report_{report.report_number}_{report.start_date}.pdf'
+
+
+def report_content_hash(report):
+    """
+    Fingerprint of everything the report PDF shows: the report and its
+    people and equipment, the checklist, daily statuses, notes, attachments,
+    the template source and the PDF options. A stored PDF is only served
+    while its fingerprint matches.
+    """
+    template = get_template(InspectionReportPDFView.template_name)
+    parts = [
+        template_digest(template.origin.name),
+        sorted(InspectionReportPDFView.cmd_options.items()),
+        [settings.PDF_IMAGE_MAX_DIMENSION, settings.PDF_IMAGE_QUALITY, settings.PDF_IMAGE_BYTE_BUDGET],
+        [report.report_number, report.start_date, report.end_date,
+         report.working_hours_from, report.working_hours_to],
+        [report.equipment.equipment_type, report.equipment.serial_number, report.equipment.model],
+        [report.operator.full_name, report.operator.employee_number,
+         report.supervisor.full_name, report.supervisor.employee_number],
+        list(ChecklistItems.objects.order_by('sort_order', 'item_id').values_list(
+            'item_id', 'item_description', 'sort_order'
+        )),
+        sorted(daily_statuses([report]).items()),
+        list(report.reportnotes_set.order_by('created_at', 'note_id').values_list('note_id', 'note_text')),
+        list(report.reportattachments_set.order_by('uploaded_at', 'attachment_id').values_list(
+            'attachment_id', 'file_path', 'original_filename', 'caption'
+        )),
+    ]
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=8)
+def _file_digest(path, mtime_ns):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def template_digest(path):
+    return _file_digest(path, os.stat(path).st_mtime_ns)
+
+
+def prerendered_pdf(report_id):
+    """
+    The stored PDF of a report if it is still current, else None.
+    Its ``filename`` attribute holds the download name.
+    """
+    stored = RenderedReportPDF.objects.select_related(
+        'report__equipment', 'report__operator', 'report__supervisor'
+    ).filter(report_id=report_id).first()
+    if stored is None or not stored.file or not stored.file.storage.exists(stored.file.name) \
+            or stored.content_hash != report_content_hash(stored.report):
+        return None
+    stored.filename = report_pdf_filename(stored.report)
+    return stored
 
 
 @extend_schema(
@@ -107,6 +228,7 @@ class InspectionReportPDFView(PDFTemplateView):
         }
     }
 )
+@replica_read
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def generate_inspection_report_pdf(request, report_id):
@@ -134,57 +256,121 @@ def generate_inspection_report_pdf(request, report_id):
         )
 
 
-@extend_schema(
-    summary='Get Report Data for PDF Preview',
-    description='Get structured report data that would be used for PDF generation.',
-    tags=['Reports'],
-)
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_report_pdf_data(request, report_id):
+def report_dates(report):
+    """Every date from the report's start date through its end date."""
+    dates = []
+    current_date = report.start_date
+    while current_date <= report.end_date:
+        dates.append(current_date)
+        current_date += timedelta(days=1)
+    return dates
+
+
+def daily_statuses(reports):
     """
-    API endpoint to get report data structure for PDF preview
+    (report_id, item_id, inspection_date) -> status for the given reports,
+    within their weeks (the only dates a PDF shows). The date bounds let a
+    partitioned table read only the partitions of those weeks.
     """
-    try:
-        report = get_object_or_404(InspectionReports, report_id=report_id)
-        
-        # Get all checklist items
-        checklist_items = ChecklistItems.objects.all().order_by('sort_order')
-        
-        # Create date range
-        current_date = report.start_date
-        dates = []
-        while current_date <= report.end_date:
-            dates.append(current_date)
-            current_date += timedelta(days=1)
-        
-        # Get daily inspection data
-        daily_data = DailyInspectionData.objects.filter(report=report)
-        
-        # Create inspection matrix
-        inspection_matrix = []
-        for item in checklist_items:
-            item_data = {
-                'item_id': item.item_id,
-                'description': item.item_description,
-                'sort_order': item.sort_order,
-                'daily_status': {}
-            }
-            
-            for date in dates:
-                try:
-                    data = daily_data.get(item=item, inspection_date=date)
-                    item_data['daily_status'][date.isoformat()] = data.status
-                except DailyInspectionData.DoesNotExist:
-                    item_data['daily_status'][date.isoformat()] = None
-            
-            inspection_matrix.append(item_data)
-        
-        # Get notes and attachments
-        notes = list(report.reportnotes_set.values('note_text', 'created_at'))
-        attachments = list(report.reportattachments_set.values('file_path', 'caption', 'uploaded_at'))
-        
-        response_data = {
+    if not reports:
+        return {}
+    return {
+        (report_id, item_id, inspection_date): item_status
+        for report_id, item_id, inspection_date, item_status in DailyInspectionData.objects.filter(
+            report_id__in=[report.report_id for report in reports],
+            inspection_date__gte=min(report.start_date for report in reports),
+            inspection_date__lte=max(report.end_date for report in reports),
+        ).values_list('report_id', 'item_id', 'inspection_date', 'status')
+    }
+
+
+# ?matrix=compact: one character per (item, date) cell.
+COMPACT_STATUS_CODES = {'good': 'G', 'not_good': 'N', None: '-'}
+MATRIX_FORMATS = ('full', 'compact')
+
+
+def pdf_checklist_items():
+    return list(ChecklistItems.objects.order_by('sort_order').values_list(
+        'item_id', 'item_description', 'sort_order'
+    ))
+
+
+def compact_checklist(checklist_items):
+    """The checklist as parallel arrays; row i of a compact matrix is item_ids[i]."""
+    return {
+        'item_ids': [item_id for item_id, _, _ in checklist_items],
+        'descriptions': [description for _, description, _ in checklist_items],
+        'sort_orders': [sort_order for _, _, sort_order in checklist_items],
+    }
+
+
+def matrix_format(request):
+    """The ``?matrix=`` format of the request; raises ValueError for unknown values."""
+    value = request.query_params.get('matrix', 'full')
+    if value not in MATRIX_FORMATS:
+        raise ValueError(f'Invalid matrix format: {value}. Use {" or ".join(MATRIX_FORMATS)}')
+    return value
+
+
+def build_report_pdf_data(reports, compact=False, checklist_items=None):
+    """
+    PDF preview data for ``reports`` (report_id -> data).
+
+    Checklist items, daily statuses, notes and attachments of all reports
+    are read with one query each; the inspection matrix is filled from
+    a dictionary instead of querying per item and date.
+
+    With ``compact`` the matrix is a string of COMPACT_STATUS_CODES, one
+    row of ``len(dates)`` characters per checklist item in sort order; the
+    checklist itself is returned once by the caller (compact_checklist).
+    """
+    reports = list(reports)
+    report_ids = [report.report_id for report in reports]
+    if checklist_items is None:
+        checklist_items = pdf_checklist_items()
+
+    statuses = daily_statuses(reports)
+
+    notes = {report_id: [] for report_id in report_ids}
+    for report_id, note_text, created_at in ReportNotes.objects.filter(
+        report_id__in=report_ids
+    ).order_by('created_at').values_list('report_id', 'note_text', 'created_at'):
+        notes[report_id].append({'note_text': note_text, 'created_at': created_at})
+
+    attachments = {report_id: [] for report_id in report_ids}
+    for report_id, file_path, original_filename, caption, uploaded_at in ReportAttachments.objects.filter(
+        report_id__in=report_ids
+    ).order_by('uploaded_at').values_list('report_id', 'file_path', 'original_filename', 'caption', 'uploaded_at'):
+        attachments[report_id].append({
+            'file_path': file_path, 'original_filename': original_filename,
+            'caption': caption, 'uploaded_at': uploaded_at,
+        })
+
+    data = {}
+    for report in reports:
+        dates = report_dates(report)
+        if compact:
+            inspection_matrix = ''.join(
+                COMPACT_STATUS_CODES[statuses.get((report.report_id, item_id, date))]
+                for item_id, _, _ in checklist_items
+                for date in dates
+            )
+        else:
+            inspection_matrix = [
+                {
+                    'item_id': item_id,
+                    'description': description,
+                    'sort_order': sort_order,
+                    'daily_status': {
+                        date.isoformat(): statuses.get((report.report_id, item_id, date)) for date in dates
+                    },
+                }
+                for item_id, description, sort_order in checklist_items
+            ]
+        report_notes = notes[report.report_id]
+        report_attachments = attachments[report.report_id]
+
+        data[report.report_id] = {
             'report': {
                 'report_id': report.report_id,
                 'report_number': report.report_number,
@@ -212,20 +398,99 @@ def get_report_pdf_data(request, report_id):
             },
             'dates': [date.isoformat() for date in dates],
             'inspection_matrix': inspection_matrix,
-            'notes': notes,
-            'attachments': attachments,
+            'notes': report_notes,
+            'attachments': report_attachments,
             'summary': {
                 'total_checklist_items': len(checklist_items),
                 'total_inspection_days': len(dates),
-                'total_notes': len(notes),
-                'total_attachments': len(attachments),
+                'total_notes': len(report_notes),
+                'total_attachments': len(report_attachments),
             }
         }
-        
+    return data
+
+
+def pdf_data_reports():
+    return InspectionReports.objects.select_related('equipment', 'operator', 'supervisor')
+
+
+MATRIX_PARAMETER = OpenApiParameter(
+    'matrix', str, enum=MATRIX_FORMATS,
+    description='compact: the inspection matrix as a string of status codes, with the '
+                'checklist and the code legend returned once',
+)
+
+
+def compact_extras(checklist_items):
+    legend = {code: item_status for item_status, code in COMPACT_STATUS_CODES.items()}
+    return {'checklist': compact_checklist(checklist_items), 'status_codes': legend}
+
+
+@extend_schema(
+    summary='Get Report Data for PDF Preview',
+    description='Get structured report data that would be used for PDF generation.',
+    parameters=[MATRIX_PARAMETER],
+    tags=['Reports'],
+)
+@replica_read
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_report_pdf_data(request, report_id):
+    """
+    API endpoint to get report data structure for PDF preview
+    """
+    try:
+        compact = matrix_format(request) == 'compact'
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        report = get_object_or_404(pdf_data_reports(), report_id=report_id)
+        checklist_items = pdf_checklist_items()
+        response_data = build_report_pdf_data([report], compact, checklist_items)[report.report_id]
+        if compact:
+            response_data.update(compact_extras(checklist_items))
         return Response(response_data, status=status.HTTP_200_OK)
         
     except Exception as e:
         return Response(
             {'error': f'Failed to get report data: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@extend_schema(
+    summary='Get Report Data for PDF Preview (batch)',
+    description='Get the PDF preview data of several reports, e.g. ?ids=1,2,3. '
+                'Reports are returned in the requested order; unknown IDs are listed in not_found.',
+    parameters=[MATRIX_PARAMETER],
+    tags=['Reports'],
+)
+@replica_read
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_reports_pdf_data(request):
+    """
+    API endpoint to get the PDF preview data of several reports at once
+    """
+    try:
+        ids = parse_id_list(request.query_params.get('ids'))
+        compact = matrix_format(request) == 'compact'
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        checklist_items = pdf_checklist_items()
+        data = build_report_pdf_data(pdf_data_reports().filter(report_id__in=ids), compact, checklist_items)
+        response_data = compact_extras(checklist_items) if compact else {}
+        response_data.update({
+            'results': [data[report_id] for report_id in ids if report_id in data],
+            'not_found': [report_id for report_id in ids if report_id not in data],
+        })
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response(
+            {'error': f'Failed to get report data: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
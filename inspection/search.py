@@ -0,0 +1,310 @@
+"""
+Full-text search over report notes, checklist item descriptions and
+report numbers.
+
+Normalized text is kept in the ``search_index`` table, created by
+migration 0003 for the database in use:
+
+- SQLite: an FTS5 virtual table, ranked with bm25.
+- PostgreSQL: a table with a generated tsvector column and a GIN index,
+  ranked with ts_rank.
+- Anything else (or SQLite built without FTS5): a plain table searched
+  with LIKE, unranked.
+
+Indexed text and queries go through the same normalization: Unicode
+NFKC, case folding, and for Arabic, removal of diacritics, tatweel and
+the definite article (also after wa/fa/bi/ka) and unification of alef,
+yeh, teh marbuta and hamza forms. A query matches entries that contain
+every query word as a word prefix.
+
+Signals (signals.py) keep the index current for saves and deletes made
+through the ORM; ``python manage.py rebuild_search_index`` rebuilds it
+after bulk changes.
+"""
+
+import logging
+import re
+import unicodedata
+
+from django.db import OperationalError, connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'search_index'
+
+logger = logging.getLogger('inspection.search')
+
+# kind -> (model name, text field, field holding the report id or None)
+INDEXED = {
+    'note': ('ReportNotes', 'note_text', 'report_id'),
+    'checklist_item': ('ChecklistItems', 'item_description', None),
+    'report': ('InspectionReports', 'report_number', 'report_id'),
+}
+
+# Harakat, Quranic marks, superscript alef and tatweel.
+_ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_ARABIC_LETTERS = str.maketrans({
+    'آ': 'ا',  # alef with madda above -> alef
+    'أ': 'ا',  # alef with hamza above -> alef
+    'إ': 'ا',  # alef with hamza below -> alef
+    'ٱ': 'ا',  # alef wasla -> alef
+    'ى': 'ي',  # alef maksura -> yeh
+    'ئ': 'ي',  # yeh with hamza above -> yeh
+    'ؤ': 'و',  # waw with hamza above -> waw
+    'ة': 'ه',  # teh marbuta -> heh
+})
+# Definite article, alone or after wa/fa/bi/ka, when at least two letters follow.
+_ARABIC_ARTICLE = re.compile(r'\b[\u0648\u0641\u0628\u0643]?\u0627\u0644(?=\w\w)')
+_WORD = re.compile(r'\w+')
+
+# FTS5 cannot index kind and object_id (UNINDEXED columns are scanned), so
+# its entries are keyed by a rowid derived from them: object_id * 4 + code.
+KIND_CODES = {'note': 1, 'checklist_item': 2, 'report': 3}
+
+
+def normalize_text(text):
+    """Normalize Arabic and Latin text for indexing and querying."""
+    text = unicodedata.normalize('NFKC', text or '')
+    text = _ARABIC_DIACRITICS.sub('', text)
+    text = _ARABIC_ARTICLE.sub('', text.translate(_ARABIC_LETTERS))
+    return text.casefold()
+
+
+def query_terms(query):
+    return _WORD.findall(normalize_text(query))
+
+
+def index_text(text):
+    """Stored form of ``text``: its normalized words separated by single spaces."""
+    return ' '.join(query_terms(text))
+
+
+def entry_rowid(kind, object_id):
+    return object_id * 4 + KIND_CODES[kind]
+
+
+def create_index_table(connection):
+    """Create ``search_index`` for the connection's database (used by the migration)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+                    f"kind UNINDEXED, object_id UNINDEXED, report_id UNINDEXED, body, "
+                    f"tokenize = 'unicode61 remove_diacritics 2')"
+                )
+                return
+            except OperationalError as e:
+                if 'already exists' in str(e):
+                    return
+                if 'no such module' not in str(e):
+                    logger.exception('Could not create the %s FTS5 table', TABLE)
+                    raise
+                logger.warning('SQLite is compiled without FTS5; full-text search falls back to LIKE')
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE {TABLE} ("
+                f"kind varchar(20) NOT NULL, object_id integer NOT NULL, report_id integer NULL, "
+                f"body text NOT NULL, "
+                f"document tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED, "
+                f"PRIMARY KEY (kind, object_id))"
+            )
+            cursor.execute(f'CREATE INDEX {TABLE}_document ON {TABLE} USING GIN (document)')
+            return
+        cursor.execute(
+            f"CREATE TABLE {TABLE} ("
+            f"kind varchar(20) NOT NULL, object_id integer NOT NULL, report_id integer NULL, "
+            f"body text NOT NULL, PRIMARY KEY (kind, object_id))"
+        )
+
+
+def drop_index_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+_backends = {}
+
+
+def backend(connection):
+    """'fts5', 'postgresql' or 'like' for the table on ``connection``."""
+    key = connection.alias
+    if key not in _backends:
+        if connection.vendor == 'postgresql':
+            _backends[key] = 'postgresql'
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT sql FROM sqlite_master WHERE name = %s', [TABLE])
+                row = cursor.fetchone()
+            _backends[key] = 'fts5' if row and 'fts5' in row[0].lower() else 'like'
+        else:
+            _backends[key] = 'like'
+    return _backends[key]
+
+
+def _write_connection(model):
+    return connections[router.db_for_write(model)]
+
+
+def _read_alias():
+    from .models import ReportNotes
+
+    return router.db_for_read(ReportNotes)
+
+
+def _entries(connection, kind, object_ids):
+    """WHERE clause and params selecting the entries of ``kind`` with ``object_ids``."""
+    placeholders = ', '.join(['%s'] * len(object_ids))
+    if backend(connection) == 'fts5':
+        return f'rowid IN ({placeholders})', [entry_rowid(kind, object_id) for object_id in object_ids]
+    return f'kind = %s AND object_id IN ({placeholders})', [kind, *object_ids]
+
+
+def _insert(connection, cursor, rows):
+    """Insert [kind, object_id, report_id, body] rows."""
+    if backend(connection) == 'fts5':
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, kind, object_id, report_id, body) VALUES (%s, %s, %s, %s, %s)',
+            [[entry_rowid(row[0], row[1]), *row] for row in rows],
+        )
+    else:
+        cursor.executemany(f'INSERT INTO {TABLE} (kind, object_id, report_id, body) VALUES (%s, %s, %s, %s)', rows)
+
+
+def index_object(kind, instance):
+    """Add or replace the index entry of a saved instance."""
+    _, field, report_field = INDEXED[kind]
+    report_id = getattr(instance, report_field) if report_field else None
+    connection = _write_connection(type(instance))
+    condition, params = _entries(connection, kind, [instance.pk])
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {condition}', params)
+        _insert(connection, cursor, [[kind, instance.pk, report_id, index_text(getattr(instance, field))]])
+
+
+def remove_object(kind, instance):
+    remove_objects(kind, [instance.pk], using=router.db_for_write(type(instance)))
+
+
+def remove_objects(kind, object_ids, using='default'):
+    """Delete the index entries of ``kind`` for ``object_ids`` (e.g. after a bulk delete)."""
+    if not object_ids:
+        return
+    connection = connections[using]
+    condition, params = _entries(connection, kind, list(object_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {condition}', params)
+
+
+def rebuild_index(get_model, using='default', batch_size=2000):
+    """
+    Recreate every index entry. ``get_model(name)`` returns the model class
+    (``apps.get_model`` bound to the inspection app). Returns rows indexed.
+    """
+    connection = connections[using]
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        for kind, (model_name, field, report_field) in INDEXED.items():
+            model = get_model(model_name)
+            pk_name = model._meta.pk.attname
+            columns = [pk_name, field] + ([report_field] if report_field not in (None, pk_name) else [])
+            rows = model._default_manager.using(using).values_list(*columns).order_by(pk_name)
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                report_id = row[0] if report_field == pk_name else (row[2] if report_field else None)
+                batch.append([kind, row[0], report_id, index_text(row[1])])
+                if len(batch) >= batch_size:
+                    _insert(connection, cursor, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                _insert(connection, cursor, batch)
+                total += len(batch)
+    return total
+
+
+def match_sql(connection, query, kinds=None):
+    """
+    (sql, params, ranked) selecting kind, object_id, report_id and rank of
+    the entries matching ``query``, best first when ``ranked``. Returns
+    None for queries without words.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return None
+    kinds = list(kinds or INDEXED)
+    kind_filter = 'kind IN (%s)' % ', '.join(['%s'] * len(kinds))
+    engine = backend(connection)
+
+    if engine == 'fts5':
+        # Quote every term so FTS5 operators in user input are literal.
+        expression = ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+        return (
+            f'SELECT kind, object_id, report_id, bm25({TABLE}) AS rank FROM {TABLE} '
+            f'WHERE {TABLE} MATCH %s AND {kind_filter} ORDER BY rank',
+            [expression, *kinds], True,
+        )
+    if engine == 'postgresql':
+        expression = ' & '.join("'%s':*" % term.replace("'", "''").replace('\\', '\\\\') for term in terms)
+        return (
+            f"SELECT kind, object_id, report_id, -ts_rank(document, to_tsquery('simple', %s)) AS rank "
+            f"FROM {TABLE} WHERE document @@ to_tsquery('simple', %s) AND {kind_filter} ORDER BY rank",
+            [expression, expression, *kinds], True,
+        )
+    # Word prefix match: the term at the start of the text or after a space.
+    conditions = ' AND '.join(["(body LIKE %s ESCAPE '!' OR body LIKE %s ESCAPE '!')"] * len(terms))
+    params = []
+    for term in terms:
+        escaped = term.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+        params += [f'{escaped}%', f'% {escaped}%']
+    return (
+        f'SELECT kind, object_id, report_id, 0 AS rank FROM {TABLE} WHERE {conditions} AND {kind_filter}',
+        [*params, *kinds], False,
+    )
+
+
+def search(query, kinds=None, limit=50, offset=0, using=None):
+    """
+    Matches as dicts with kind, object_id and report_id, best first where
+    the backend ranks. Reads from ``using`` (default: where note reads go).
+    """
+    connection = connections[using or _read_alias()]
+    statement = match_sql(connection, query, kinds)
+    if statement is None:
+        return []
+    sql, params, _ = statement
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} LIMIT %s OFFSET %s', [*params, limit, offset])
+        return [
+            {'kind': kind, 'object_id': object_id, 'report_id': report_id}
+            for kind, object_id, report_id, _ in cursor.fetchall()
+        ]
+
+
+def matching_ids(query, kind, using=None):
+    """
+    (sql, params) of a subquery selecting the object IDs of ``kind``
+    entries matching ``query``, for ``RawSQL``; None without words.
+    """
+    connection = connections[using or _read_alias()]
+    statement = match_sql(connection, query, [kind])
+    if statement is None:
+        return None
+    sql, params, _ = statement
+    return f'SELECT object_id FROM ({sql}) AS matches', params
+
+
+def filter_matching(queryset, query, fields):
+    """
+    Narrow ``queryset`` to rows matching ``query``. ``fields`` maps index
+    kinds to the field holding the matching ID, e.g.
+    ``{'note': 'pk', 'report': 'report_id'}``; a row matches if any does.
+    """
+    condition = Q()
+    for kind, field in fields.items():
+        subquery = matching_ids(query, kind, using=queryset.db)
+        if subquery is None:
+            return queryset.none()
+        condition |= Q(**{f'{field}__in': RawSQL(*subquery)})
+    return queryset.filter(condition)
@@ -0,0 +1,80 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+from . import search
+from .models import ChecklistItems, InspectionReports, ReportNotes
+
+# kind -> (model, text field) used to return the original, unnormalized text.
+SEARCH_SOURCES = {
+    'note': (ReportNotes, 'note_text'),
+    'checklist_item': (ChecklistItems, 'item_description'),
+    'report': (InspectionReports, 'report_number'),
+}
+
+
+@extend_schema(
+    summary='Full-text Search',
+    description=(
+        'Search report notes, checklist item descriptions and report numbers. '
+        'Every word of the query must match the start of a word in the text; '
+        'Arabic diacritics and alef/yeh/teh marbuta variants are ignored. '
+        'Results are ranked by relevance where the database supports it.'
+    ),
+    parameters=[
+        OpenApiParameter('q', str, required=True, description='Search query'),
+        OpenApiParameter('type', str, description='Comma-separated kinds: note, checklist_item, report'),
+        OpenApiParameter('limit', int, description='Maximum results (default 20, max 100)'),
+        OpenApiParameter('offset', int, description='Number of results to skip'),
+    ],
+    tags=['Search'],
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_view(request):
+    """
+    API endpoint for ranked full-text search across notes, checklist items and reports
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+    unknown = sorted(set(kinds) - set(SEARCH_SOURCES))
+    if unknown:
+        return Response(
+            {'error': f'Unknown type: {", ".join(unknown)}. Use {", ".join(SEARCH_SOURCES)}'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        limit = min(int(request.query_params.get('limit', 20)), 100)
+        offset = int(request.query_params.get('offset', 0))
+        if limit < 1 or offset < 0:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'limit and offset must be non-negative integers'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    matches = search.search(query, kinds or None, limit=limit, offset=offset)
+
+    # One query per kind for the original text of the page of results.
+    texts = {}
+    for kind, (model, field) in SEARCH_SOURCES.items():
+        ids = [match['object_id'] for match in matches if match['kind'] == kind]
+        if ids:
+            texts[kind] = dict(model.objects.filter(pk__in=ids).values_list('pk', field))
+
+    results = [
+        {
+            'type': match['kind'],
+            'id': match['object_id'],
+            'report_id': match['report_id'],
+            'text': texts.get(match['kind'], {})[match['object_id']],
+        }
+        for match in matches
+        if match['object_id'] in texts.get(match['kind'], {})
+    ]
+    return Response({'query': query, 'limit': limit, 'offset': offset, 'results': results},
+                    status=status.HTTP_200_OK)
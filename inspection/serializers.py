@@ -1,9 +1,17 @@
+from functools import lru_cache
+
+from django.db.models import F, Prefetch, Value
+from django.db.models.functions import Concat
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from .models import (
     Equipment, Users, ChecklistItems, InspectionReports,
-    DailyInspectionData, ReportNotes, ReportAttachments
+    DailyInspectionData, ReportNotes, ReportAttachments, ComplianceStatus
 )
 
+# Database expression for Equipment.__str__, used by the values() list path.
+EQUIPMENT_INFO = Concat(F('equipment__equipment_type'), Value(' - '), F('equipment__serial_number'))
+
 
 class EquipmentSerializer(serializers.ModelSerializer):
     """Serializer for Equipment model with CRUD operations."""
@@ -47,7 +55,16 @@ class ReportAttachmentsSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReportAttachments
         fields = '__all__'
-        read_only_fields = ['attachment_id', 'uploaded_at']
+        read_only_fields = ['attachment_id', 'original_filename', 'content_hash', 'uploaded_at']
+
+
+class ComplianceStatusSerializer(serializers.ModelSerializer):
+    """Serializer for ComplianceStatus model (written by the compliance scan)."""
+    serial_number = serializers.CharField(source='equipment.serial_number', read_only=True)
+    
+    class Meta:
+        model = ComplianceStatus
+        fields = '__all__'
 
 
 class DailyInspectionDataSerializer(serializers.ModelSerializer):
@@ -60,11 +77,36 @@ class DailyInspectionDataSerializer(serializers.ModelSerializer):
         read_only_fields = ['inspection_data_id']
 
 
+class DailyInspectionDataKeySerializer(serializers.Serializer):
+    """Identifies a daily inspection entry by ID or by (report, item, inspection_date)."""
+    inspection_data_id = serializers.IntegerField(required=False)
+    report = serializers.IntegerField(required=False)
+    item = serializers.IntegerField(required=False)
+    inspection_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if 'inspection_data_id' in attrs:
+            return attrs
+        missing = [name for name in ('report', 'item', 'inspection_date') if name not in attrs]
+        if missing:
+            raise serializers.ValidationError(
+                'Provide inspection_data_id or report, item and inspection_date '
+                f'(missing: {", ".join(missing)}).'
+            )
+        return attrs
+
+
+class DailyInspectionDataBulkUpdateSerializer(DailyInspectionDataKeySerializer):
+    """One entry of a bulk status update."""
+    status = serializers.ChoiceField(choices=DailyInspectionData.STATUS_CHOICES)
+
+
 class InspectionReportsSerializer(serializers.ModelSerializer):
     """Serializer for InspectionReports model with nested related data."""
     operator_name = serializers.CharField(source='operator.full_name', read_only=True)
     supervisor_name = serializers.CharField(source='supervisor.full_name', read_only=True)
     equipment_info = serializers.CharField(source='equipment.__str__', read_only=True)
+    values_expressions = {'equipment_info': EQUIPMENT_INFO}
     
     # Nested serializers for related data (optional - for detailed view)
     daily_inspection_data = DailyInspectionDataSerializer(many=True, read_only=True, source='dailyinspectiondata_set')
@@ -82,6 +124,7 @@ class InspectionReportsListSerializer(serializers.ModelSerializer):
     operator_name = serializers.CharField(source='operator.full_name', read_only=True)
     supervisor_name = serializers.CharField(source='supervisor.full_name', read_only=True)
     equipment_info = serializers.CharField(source='equipment.__str__', read_only=True)
+    values_expressions = {'equipment_info': EQUIPMENT_INFO}
     
     class Meta:
         model = InspectionReports
@@ -91,4 +134,148 @@ class InspectionReportsListSerializer(serializers.ModelSerializer):
             'start_date', 'end_date', 'working_hours_from', 'working_hours_to',
             'created_at'
         ]
-        read_only_fields = ['report_id', 'created_at']
\ No newline at end of file
+        read_only_fields = ['report_id', 'created_at']
+
+
+@lru_cache(maxsize=None)
+def serializer_fields(serializer_class):
+    """Return (field names in output order, names of nested relation fields)."""
+    fields = serializer_class().fields
+    nested = frozenset(
+        name for name, field in fields.items() if isinstance(field, serializers.BaseSerializer)
+    )
+    return tuple(fields), nested
+
+
+@lru_cache(maxsize=None)
+def queryset_plan(serializer_class, fields=None, required=()):
+    """
+    Return (only, select_related, prefetch) lookups needed to render
+    ``fields`` (all if None) of ``serializer_class``; ``required`` columns
+    are always loaded. prefetch holds (source, child serializer class,
+    foreign key of the child model) triples.
+    """
+    model = serializer_class.Meta.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    reverse = {rel.get_accessor_name(): rel.field.name for rel in model._meta.related_objects}
+    only = {model._meta.pk.name, *required}
+    select_related = set()
+    prefetch = []
+    full_row = False
+
+    for name, field in serializer_class().fields.items():
+        if fields is not None and name not in fields:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            prefetch.append((field.source, type(field.child), reverse.get(field.source)))
+            continue
+        path = field.source.split('.')
+        if field.source == '*' or isinstance(field, serializers.SerializerMethodField) \
+                or path[0] not in concrete:
+            # Methods and properties may read any attribute; load the full row.
+            full_row = True
+            continue
+        only.add(path[0])
+        if len(path) > 1:
+            select_related.add('__'.join(path[:-1]))
+
+    if full_row:
+        only = concrete
+    return tuple(sorted(only & concrete)), tuple(sorted(select_related)), tuple(prefetch)
+
+
+def optimize_queryset(queryset, serializer_class, fields=None, required=()):
+    """
+    Load only what ``serializer_class`` renders for ``fields`` (all if None).
+
+    Columns are limited with only(), dotted sources such as
+    ``operator.full_name`` become select_related() joins and nested
+    serializers are prefetched with their own querysets optimized. Nested
+    fields that are not rendered are not prefetched.
+    """
+    only, select_related, prefetch = queryset_plan(serializer_class, fields, required)
+    queryset = queryset.only(*only)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch:
+        queryset = queryset.prefetch_related(*(
+            Prefetch(source, queryset=optimize_queryset(
+                child.Meta.model._default_manager.all(), child, required=(foreign_key,) if foreign_key else (),
+            ))
+            for source, child, foreign_key in prefetch
+        ))
+    return queryset
+
+
+class ValuesReader:
+    """
+    Read-only list representation built from ``.values_list()`` rows.
+
+    Field names and order are taken from ``serializer_class`` so the output
+    matches the serializer's, without creating model instances or running
+    DRF field dispatch per value. Dotted sources become joins; computed
+    fields must be listed in the serializer's ``values_expressions``.
+    ``fields`` restricts the output to those names. Serializers with nested
+    or method fields among the rendered fields are not ``supported``.
+    Date and time values go through the serializer field's
+    ``to_representation`` (time zone conversion and output format).
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        expressions = getattr(serializer_class, 'values_expressions', {})
+        self.names = []
+        self.columns = []
+        self.file_fields = {}
+        self.temporal_fields = {}
+        self.supported = True
+
+        for name, field in serializer.fields.items():
+            if field.write_only or (fields is not None and name not in fields):
+                continue
+            if name in expressions:
+                column = expressions[name]
+            elif isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)) \
+                    or field.source == '*':
+                self.supported = False
+                return
+            else:
+                column = field.source.replace('.', '__')
+                if isinstance(field, serializers.FileField):
+                    self.file_fields[name] = model._meta.get_field(field.source).storage
+                elif isinstance(field, (serializers.DateTimeField, serializers.DateField, serializers.TimeField)):
+                    self.temporal_fields[name] = field.to_representation
+            self.names.append(name)
+            self.columns.append(column)
+
+    def queryset(self, queryset):
+        """Turn a model queryset into one yielding value tuples."""
+        return queryset.prefetch_related(None).values_list(*self.columns)
+
+    def rows(self, values, request=None):
+        """Build response dicts from value tuples."""
+        names = self.names
+        rows = [dict(zip(names, row)) for row in values]
+        if self.temporal_fields:
+            for row in rows:
+                for name, to_representation in self.temporal_fields.items():
+                    if row[name] is not None:
+                        row[name] = to_representation(row[name])
+        if self.file_fields:
+            use_url = api_settings.UPLOADED_FILES_USE_URL
+            for row in rows:
+                for name, storage in self.file_fields.items():
+                    path = row[name]
+                    if not path:
+                        row[name] = None
+                    elif use_url:
+                        url = storage.url(path)
+                        row[name] = request.build_absolute_uri(url) if request is not None else url
+        return rows
+
+
+@lru_cache(maxsize=None)
+def values_reader(serializer_class, fields=None):
+    """Cached ValuesReader; ``fields`` must be hashable (e.g. a frozenset)."""
+    return ValuesReader(serializer_class, fields)
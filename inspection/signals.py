@@ -0,0 +1,115 @@
+import os
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import search
+from .blobs import BLOB_DIR, blob_hash, file_sha256, is_blob
+from .cache import invalidate_namespace
+from .models import (
+    ChecklistItems, Equipment, InspectionReports, RenderedReportPDF, ReportAttachments, ReportNotes, Users,
+)
+
+CACHED_MODELS = {
+    Equipment: 'equipment',
+    Users: 'users',
+    ChecklistItems: 'checklist-items',
+}
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=Users)
+@receiver(post_save, sender=ChecklistItems)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_delete, sender=Users)
+@receiver(post_delete, sender=ChecklistItems)
+def invalidate_cached_responses(sender, **kwargs):
+    """Drop cached API responses when reference data changes."""
+    invalidate_namespace(CACHED_MODELS[sender])
+
+
+@receiver(post_delete, sender=RenderedReportPDF)
+def delete_rendered_pdf_file(sender, instance, **kwargs):
+    """Remove the stored PDF together with its row (e.g. when the report is deleted)."""
+    if instance.file:
+        instance.file.storage.delete(instance.file.name)
+
+
+SEARCH_INDEXED_MODELS = {
+    ReportNotes: 'note',
+    ChecklistItems: 'checklist_item',
+    InspectionReports: 'report',
+}
+
+
+@receiver(post_save, sender=ReportNotes)
+@receiver(post_save, sender=ChecklistItems)
+@receiver(post_save, sender=InspectionReports)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Keep the full-text search index in step with saved notes, items and reports."""
+    if not raw:
+        search.index_object(SEARCH_INDEXED_MODELS[sender], instance)
+
+
+@receiver(post_delete, sender=ReportNotes)
+@receiver(post_delete, sender=ChecklistItems)
+@receiver(post_delete, sender=InspectionReports)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_object(SEARCH_INDEXED_MODELS[sender], instance)
+
+
+@receiver(pre_save, sender=ReportAttachments)
+def deduplicate_attachment(sender, instance, raw=False, **kwargs):
+    """
+    Store a new upload under its content hash, reusing the stored blob
+    when the same content was uploaded before (see blobs.py).
+    """
+    file = instance.file_path
+    if raw or not file or file._committed:
+        return
+    instance.original_filename = os.path.basename(file.name)[:255]
+    instance.content_hash = file_sha256(file)
+    # Lock a committed attachment sharing the blob, so it cannot be deleted
+    # (releasing the blob) before this row is committed; ReportAttachments.save()
+    # provides the transaction.
+    shared = sender.objects.select_for_update().filter(
+        content_hash=instance.content_hash, file_path__startswith=BLOB_DIR + '/',
+    ).exclude(pk=instance.pk).values_list('file_path', flat=True).first()
+    if shared and file.storage.exists(shared):
+        file.name = shared
+        file._committed = True  # nothing to write
+    if instance.pk:
+        # A replaced file may have been the last reference to its blob.
+        instance._replaced_file = sender.objects.filter(pk=instance.pk).values_list('file_path', flat=True).first()
+
+
+@receiver(post_save, sender=ReportAttachments)
+def release_replaced_attachment_file(sender, instance, **kwargs):
+    replaced = instance.__dict__.pop('_replaced_file', None)
+    if replaced and replaced != instance.file_path.name:
+        release_attachment_file(instance.file_path.storage, replaced)
+
+
+@receiver(post_delete, sender=ReportAttachments)
+def release_deleted_attachment_file(sender, instance, **kwargs):
+    if instance.file_path:
+        release_attachment_file(instance.file_path.storage, instance.file_path.name)
+
+
+def release_attachment_file(storage, name):
+    """
+    Delete a stored attachment file once the transaction commits, unless a
+    committed row still uses it. Uploads reusing the blob meanwhile hold a
+    lock on such a row (see deduplicate_attachment), so counting the
+    references right before deleting is enough.
+    """
+    def collect():
+        references = ReportAttachments.objects.filter(file_path=name)
+        if is_blob(name):
+            # The blob name is its hash; narrow by the indexed column.
+            references = references.filter(content_hash=blob_hash(name))
+        if not references.exists():
+            storage.delete(name)
+
+    transaction.on_commit(collect)
@@ -1 +0,0 @@
-# Empty file to make Python treat this directory as a package
\ No newline at end of file
@@ -0,0 +1,42 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class QueryAuditTestRunner(DiscoverRunner):
+    """
+    Test runner that turns N+1 query detection into test failures.
+
+    Every request made through the test client runs QueryAuditMiddleware in
+    raise mode, so a view that repeats a query template more than
+    QUERY_AUDIT_NPLUSONE_THRESHOLD times fails the test with NPlusOneError.
+    The settings are restored when the test environment is torn down.
+    """
+
+    def __init__(self, query_audit=True, nplusone_threshold=None, **kwargs):
+        super().__init__(**kwargs)
+        self.query_audit = query_audit
+        self.nplusone_threshold = nplusone_threshold
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--no-query-audit', action='store_false', dest='query_audit',
+            help='Do not fail tests on repeated (N+1) queries.',
+        )
+        parser.add_argument(
+            '--nplusone-threshold', type=int, default=None,
+            help='Maximum executions of one query template per request.',
+        )
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        audit_settings = {'QUERY_AUDIT_ENABLED': self.query_audit, 'QUERY_AUDIT_RAISE': self.query_audit}
+        if self.nplusone_threshold is not None:
+            audit_settings['QUERY_AUDIT_NPLUSONE_THRESHOLD'] = self.nplusone_threshold
+        self._audit_settings = override_settings(**audit_settings)
+        self._audit_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._audit_settings.disable()
+        super().teardown_test_environment(**kwargs)
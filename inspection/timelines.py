@@ -0,0 +1,53 @@
+"""
+Per-day inspection history of equipment, in columnar form.
+
+A timeline lists the days on which a machine was inspected in a date
+range, one value per day in each column:
+
+    {"equipment_id": 4,
+     "dates":   ["2025-03-03", "2025-03-04", ...],
+     "status":  ["good", "not_good", ...],   # not_good if any item failed
+     "checked": [20, 20, ...],               # items inspected that day
+     "failed":  [0, 2, ...]}                 # items marked not_good
+
+Items are counted once per day even when overlapping reports of the same
+machine both record them. Days without inspection data are left out. The timelines of any number of
+machines come from one grouped query over daily_inspection_data.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, Q
+
+from .models import DailyInspectionData
+
+COLUMNS = ('dates', 'status', 'checked', 'failed')
+
+
+def equipment_timelines(equipment_ids, start_date, end_date):
+    """Return {equipment_id: timeline} for every ID in ``equipment_ids``."""
+    rows = (
+        DailyInspectionData.objects
+        .filter(
+            report__equipment_id__in=equipment_ids,
+            inspection_date__gte=start_date,
+            inspection_date__lte=end_date,
+        )
+        .values_list('report__equipment_id', 'inspection_date')
+        .annotate(
+            checked=Count('item', distinct=True),
+            failed=Count('item', distinct=True, filter=Q(status='not_good')),
+        )
+        .order_by('report__equipment_id', 'inspection_date')
+    )
+    columns = defaultdict(lambda: {name: [] for name in COLUMNS})
+    for equipment_id, inspection_date, checked, failed in rows:
+        timeline = columns[equipment_id]
+        timeline['dates'].append(inspection_date.isoformat())
+        timeline['status'].append('not_good' if failed else 'good')
+        timeline['checked'].append(checked)
+        timeline['failed'].append(failed)
+    return {
+        equipment_id: {'equipment_id': equipment_id, **columns[equipment_id]}
+        for equipment_id in equipment_ids
+    }
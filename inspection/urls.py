@@ -3,7 +3,12 @@ from rest_framework.routers import DefaultRouter
 from . import views
 from .api_views import api_root
 from .auth_views import api_login, api_logout, api_user_info
-from .pdf_views import InspectionReportPDFView, generate_inspection_report_pdf, get_report_pdf_data
+from .metrics_views import request_metrics
+from .search_views import search_view
+from .pdf_views import (
+    InspectionReportPDFView, generate_inspection_report_pdf, get_report_pdf_data,
+    get_reports_pdf_data,
+)
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -14,6 +19,7 @@ router.register(r'inspection-reports', views.InspectionReportsViewSet, basename=
 router.register(r'daily-inspection-data', views.DailyInspectionDataViewSet, basename='daily-inspection-data')
 router.register(r'report-notes', views.ReportNotesViewSet, basename='report-notes')
 router.register(r'report-attachments', views.ReportAttachmentsViewSet, basename='report-attachments')
+router.register(r'compliance', views.ComplianceStatusViewSet, basename='compliance')
 
 # The API URLs are now determined automatically by the router
 urlpatterns = [
@@ -23,8 +29,13 @@ urlpatterns = [
     path('api/auth/login/', api_login, name='api-login'),
     path('api/auth/logout/', api_logout, name='api-logout'),
     path('api/auth/user/', api_user_info, name='api-user-info'),
+    # Full-text search
+    path('api/search/', search_view, name='search'),
+    # Monitoring endpoints
+    path('api/metrics/', request_metrics, name='request-metrics'),
     # PDF generation endpoints
     path('api/reports/<int:report_id>/pdf/', generate_inspection_report_pdf, name='inspection-report-pdf'),
+    path('api/reports/pdf-data/', get_reports_pdf_data, name='inspection-reports-pdf-data'),
     path('api/reports/<int:report_id>/pdf-data/', get_report_pdf_data, name='inspection-report-pdf-data'),
     path('reports/<int:report_id>/pdf/', InspectionReportPDFView.as_view(), name='inspection-report-pdf-view'),
 ]
\ No newline at end of file
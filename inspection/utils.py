@@ -0,0 +1,49 @@
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+
+
+def parse_id_list(value):
+    """
+    Parse a comma separated ``?ids=`` value into a list of unique integer
+    IDs in the given order. Raises ValueError with a client-facing message.
+    """
+    if not value:
+        raise ValueError('The ids parameter is required, e.g. ?ids=1,2,3')
+    ids = []
+    seen = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValueError(f'Invalid id: {part}')
+        if int(part) not in seen:
+            seen.add(int(part))
+            ids.append(int(part))
+    limit = getattr(settings, 'API_BATCH_MAX_IDS', 100)
+    if len(ids) > limit:
+        raise ValueError(f'At most {limit} ids can be requested at once')
+    return ids
+
+
+def parse_date_range(start_value, end_value, default_days=365):
+    """
+    Parse optional ``?start_date=`` / ``?end_date=`` (YYYY-MM-DD) values.
+    ``end_date`` defaults to today and ``start_date`` to ``default_days``
+    before it. Raises ValueError with a client-facing message.
+    """
+    try:
+        end_date = datetime.strptime(end_value, '%Y-%m-%d').date() if end_value else date.today()
+        start_date = (
+            datetime.strptime(start_value, '%Y-%m-%d').date() if start_value
+            else end_date - timedelta(days=default_days)
+        )
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+    if start_date > end_date:
+        raise ValueError('start_date must not be after end_date')
+    limit = getattr(settings, 'API_TIMELINE_MAX_DAYS', 366)
+    if (end_date - start_date).days + 1 > limit:
+        raise ValueError(f'The date range can span at most {limit} days')
+    return start_date, end_date
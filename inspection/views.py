@@ -1,23 +1,33 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import Q
 from datetime import datetime, date, timedelta
 
+from .cache import cache_response
+from . import compliance
+from .downloads import serve_file
+from .filters import FullTextSearchFilter
+from .mixins import SparseFieldsMixin, ValuesListMixin
 from .models import (
     Equipment, Users, ChecklistItems, InspectionReports,
-    DailyInspectionData, ReportNotes, ReportAttachments
+    DailyInspectionData, ReportNotes, ReportAttachments, ComplianceStatus
 )
 from .serializers import (
     EquipmentSerializer, UsersSerializer, ChecklistItemsSerializer,
     InspectionReportsSerializer, InspectionReportsListSerializer,
-    DailyInspectionDataSerializer, ReportNotesSerializer, ReportAttachmentsSerializer
+    DailyInspectionDataSerializer, ReportNotesSerializer, ReportAttachmentsSerializer,
+    DailyInspectionDataKeySerializer, DailyInspectionDataBulkUpdateSerializer,
+    ComplianceStatusSerializer, values_reader
 )
+from .timelines import equipment_timelines
+from .utils import parse_date_range, parse_id_list
 
 
-class EquipmentViewSet(viewsets.ModelViewSet):
+class EquipmentViewSet(SparseFieldsMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Equipment model with full CRUD operations.
     
@@ -28,6 +38,8 @@ class EquipmentViewSet(viewsets.ModelViewSet):
     - PUT /api/equipment/{id}/ - Update equipment
     - PATCH /api/equipment/{id}/ - Partial update equipment
     - DELETE /api/equipment/{id}/ - Delete equipment
+    - GET /api/equipment/{id}/timeline/ - Per-day inspection status of one machine
+    - GET /api/equipment/timeline/ - Timelines of several machines at once
     """
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
@@ -37,16 +49,75 @@ class EquipmentViewSet(viewsets.ModelViewSet):
     search_fields = ['serial_number', 'equipment_type', 'model']
     ordering_fields = ['equipment_id', 'serial_number', 'equipment_type', 'model']
     ordering = ['equipment_type', 'serial_number']
+    cache_namespace = 'equipment'
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=False, methods=['get'])
+    @cache_response
     def active(self, request):
         """Get only active equipment."""
-        active_equipment = self.queryset.filter(status='active')
-        serializer = self.get_serializer(active_equipment, many=True)
-        return Response(serializer.data)
+        active_equipment = self.get_queryset().filter(status='active')
+        return self.values_response(active_equipment)
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Get the per-day inspection status of one machine over a date range."""
+        equipment = self.get_object()
+        try:
+            start_date, end_date = parse_date_range(
+                request.query_params.get('start_date'), request.query_params.get('end_date')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        timeline = equipment_timelines([equipment.pk], start_date, end_date)[equipment.pk]
+        return Response({'start_date': start_date, 'end_date': end_date, **timeline})
+
+    @action(detail=False, methods=['get'], url_path='timeline', url_name='timelines')
+    def timelines(self, request):
+        """
+        Get the timelines of the machines in ``?ids=``, or of one page of the
+        filtered equipment list when no IDs are given.
+        """
+        try:
+            start_date, end_date = parse_date_range(
+                request.query_params.get('start_date'), request.query_params.get('end_date')
+            )
+            ids = parse_id_list(request.query_params['ids']) if 'ids' in request.query_params else None
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        period = {'start_date': start_date, 'end_date': end_date}
+        if ids is not None:
+            found = set(self.get_queryset().filter(pk__in=ids).values_list('pk', flat=True))
+            found_ids = [equipment_id for equipment_id in ids if equipment_id in found]
+            timelines = equipment_timelines(found_ids, start_date, end_date)
+            return Response({
+                **period,
+                'results': [timelines[equipment_id] for equipment_id in found_ids],
+                'not_found': [equipment_id for equipment_id in ids if equipment_id not in found],
+            })
 
+        queryset = self.filter_queryset(self.get_queryset()).values_list('pk', flat=True)
+        page = self.paginate_queryset(queryset)
+        equipment_ids = list(page if page is not None else queryset)
+        timelines = equipment_timelines(equipment_ids, start_date, end_date)
+        results = [timelines[equipment_id] for equipment_id in equipment_ids]
+        if page is None:
+            return Response({**period, 'results': results})
+        response = self.get_paginated_response(results)
+        response.data = {**period, **response.data}
+        return response
 
-class UsersViewSet(viewsets.ModelViewSet):
+
+class UsersViewSet(SparseFieldsMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Users model with full CRUD operations.
     
@@ -66,23 +137,32 @@ class UsersViewSet(viewsets.ModelViewSet):
     search_fields = ['full_name', 'employee_number']
     ordering_fields = ['user_id', 'full_name', 'role', 'employee_number']
     ordering = ['full_name']
+    cache_namespace = 'users'
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=False, methods=['get'])
+    @cache_response
     def operators(self, request):
         """Get only operators."""
-        operators = self.queryset.filter(role='operator')
-        serializer = self.get_serializer(operators, many=True)
-        return Response(serializer.data)
+        operators = self.get_queryset().filter(role='operator')
+        return self.values_response(operators)
 
     @action(detail=False, methods=['get'])
+    @cache_response
     def supervisors(self, request):
         """Get only supervisors."""
-        supervisors = self.queryset.filter(role='supervisor')
-        serializer = self.get_serializer(supervisors, many=True)
-        return Response(serializer.data)
+        supervisors = self.get_queryset().filter(role='supervisor')
+        return self.values_response(supervisors)
 
 
-class ChecklistItemsViewSet(viewsets.ModelViewSet):
+class ChecklistItemsViewSet(SparseFieldsMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for ChecklistItems model with full CRUD operations.
     
@@ -97,10 +177,20 @@ class ChecklistItemsViewSet(viewsets.ModelViewSet):
     queryset = ChecklistItems.objects.all()
     serializer_class = ChecklistItemsSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['item_description']
+    fulltext_search = {'checklist_item': 'pk'}
     ordering_fields = ['item_id', 'sort_order']
     ordering = ['sort_order']
+    cache_namespace = 'checklist-items'
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=False, methods=['post'])
     def reorder(self, request):
@@ -121,7 +211,7 @@ class ChecklistItemsViewSet(viewsets.ModelViewSet):
         return Response({'message': 'Items reordered successfully'}, status=status.HTTP_200_OK)
 
 
-class InspectionReportsViewSet(viewsets.ModelViewSet):
+class InspectionReportsViewSet(SparseFieldsMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for InspectionReports model with full CRUD operations.
     
@@ -132,9 +222,12 @@ class InspectionReportsViewSet(viewsets.ModelViewSet):
     - PUT /api/inspection-reports/{id}/ - Update inspection report
     - PATCH /api/inspection-reports/{id}/ - Partial update inspection report
     - DELETE /api/inspection-reports/{id}/ - Delete inspection report
+    - GET /api/inspection-reports/batch/?ids=1,2,3 - Retrieve several reports at once
     """
     queryset = InspectionReports.objects.all()
+    expanded_serializer_class = InspectionReportsSerializer
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['equipment', 'operator', 'supervisor', 'start_date', 'end_date']
     search_fields = ['report_number', 'equipment__serial_number', 'operator__full_name', 'supervisor__full_name']
@@ -154,23 +247,39 @@ class InspectionReportsViewSet(viewsets.ModelViewSet):
         start_of_week = today - timedelta(days=today.weekday())
         end_of_week = start_of_week + timedelta(days=6)
         
-        reports = self.queryset.filter(
+        reports = self.get_queryset().filter(
             start_date__lte=end_of_week,
             end_date__gte=start_of_week
         )
         serializer = self.get_serializer(reports, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """Get several reports, with their nested data, in one request."""
+        try:
+            ids = parse_id_list(request.query_params.get('ids'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        reports = {report.pk: report for report in self.get_queryset().filter(pk__in=ids)}
+        found = [reports[report_id] for report_id in ids if report_id in reports]
+        serializer = self.get_serializer(found, many=True)
+        return Response({
+            'results': serializer.data,
+            'not_found': [report_id for report_id in ids if report_id not in reports],
+        })
+
     @action(detail=True, methods=['get'])
     def daily_data(self, request, pk=None):
         """Get all daily inspection data for a specific report."""
         report = self.get_object()
         daily_data = DailyInspectionData.objects.filter(report=report)
-        serializer = DailyInspectionDataSerializer(daily_data, many=True)
-        return Response(serializer.data)
+        reader = values_reader(DailyInspectionDataSerializer)
+        return Response(reader.rows(reader.queryset(daily_data), request))
 
 
-class DailyInspectionDataViewSet(viewsets.ModelViewSet):
+class DailyInspectionDataViewSet(SparseFieldsMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for DailyInspectionData model with full CRUD operations.
     
@@ -181,12 +290,20 @@ class DailyInspectionDataViewSet(viewsets.ModelViewSet):
     - PUT /api/daily-inspection-data/{id}/ - Update daily inspection data
     - PATCH /api/daily-inspection-data/{id}/ - Partial update daily inspection data
     - DELETE /api/daily-inspection-data/{id}/ - Delete daily inspection data
+    - PATCH /api/daily-inspection-data/bulk_update/ - Change the status of many entries
+    - DELETE /api/daily-inspection-data/bulk_delete/ - Delete many entries
     """
     queryset = DailyInspectionData.objects.all()
     serializer_class = DailyInspectionDataSerializer
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['report', 'item', 'status', 'inspection_date']
+    filterset_fields = {
+        'report': ['exact'],
+        'item': ['exact'],
+        'status': ['exact'],
+        'inspection_date': ['exact', 'gte', 'lte'],
+    }
     search_fields = ['report__report_number', 'item__item_description']
     ordering_fields = ['inspection_data_id', 'inspection_date', 'status']
     ordering = ['-inspection_date', 'item__sort_order']
@@ -200,6 +317,80 @@ class DailyInspectionDataViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def resolve_entries(self, entries):
+        """
+        Find the rows addressed by validated key entries with at most two
+        queries. Returns (rows aligned with ``entries``, per-entry errors);
+        rows are None where the entry did not match.
+        """
+        queryset = DailyInspectionData.objects.select_for_update()
+        ids = [entry['inspection_data_id'] for entry in entries if 'inspection_data_id' in entry]
+        keyed = [entry for entry in entries if 'inspection_data_id' not in entry]
+
+        by_id = {row.pk: row for row in queryset.filter(pk__in=ids)} if ids else {}
+        by_key = {}
+        if keyed:
+            candidates = queryset.filter(
+                report_id__in={entry['report'] for entry in keyed},
+                item_id__in={entry['item'] for entry in keyed},
+                inspection_date__in={entry['inspection_date'] for entry in keyed},
+            )
+            by_key = {(row.report_id, row.item_id, row.inspection_date): row for row in candidates}
+
+        rows = []
+        errors = []
+        for entry in entries:
+            if 'inspection_data_id' in entry:
+                row = by_id.get(entry['inspection_data_id'])
+            else:
+                row = by_key.get((entry['report'], entry['item'], entry['inspection_date']))
+            rows.append(row)
+            errors.append({} if row is not None else {'non_field_errors': ['Daily inspection data not found.']})
+        return rows, errors
+
+    @action(detail=False, methods=['patch'])
+    def bulk_update(self, request):
+        """
+        Change the status of multiple entries, addressed by inspection_data_id
+        or by report, item and inspection_date. Nothing is saved unless every
+        entry is valid; errors are returned per entry in request order.
+        Like bulk_delete this skips model signals, which is safe while
+        nothing listens to DailyInspectionData (stored PDFs are fingerprinted).
+        """
+        serializer = DailyInspectionDataBulkUpdateSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            rows, errors = self.resolve_entries(serializer.validated_data)
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+            changed = {}
+            for row, entry in zip(rows, serializer.validated_data):
+                row.status = entry['status']
+                changed[row.pk] = row
+            DailyInspectionData.objects.bulk_update(changed.values(), ['status'], batch_size=500)
+
+        return Response({'updated': len(changed)}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['delete'])
+    def bulk_delete(self, request):
+        """
+        Delete multiple entries, addressed like in bulk_update. Nothing is
+        deleted unless every entry matches a row.
+        """
+        serializer = DailyInspectionDataKeySerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            rows, errors = self.resolve_entries(serializer.validated_data)
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+            deleted, _ = DailyInspectionData.objects.filter(pk__in={row.pk for row in rows}).delete()
+
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def by_date_range(self, request):
         """Get daily inspection data within a date range."""
@@ -221,15 +412,14 @@ class DailyInspectionDataViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        data = self.queryset.filter(
+        data = self.get_queryset().filter(
             inspection_date__gte=start_date,
             inspection_date__lte=end_date
         )
-        serializer = self.get_serializer(data, many=True)
-        return Response(serializer.data)
+        return self.values_response(data)
 
 
-class ReportNotesViewSet(viewsets.ModelViewSet):
+class ReportNotesViewSet(SparseFieldsMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for ReportNotes model with full CRUD operations.
     
@@ -244,14 +434,15 @@ class ReportNotesViewSet(viewsets.ModelViewSet):
     queryset = ReportNotes.objects.all()
     serializer_class = ReportNotesSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['report']
     search_fields = ['note_text', 'report__report_number']
+    fulltext_search = {'note': 'pk', 'report': 'report_id'}
     ordering_fields = ['note_id', 'created_at']
     ordering = ['-created_at']
 
 
-class ReportAttachmentsViewSet(viewsets.ModelViewSet):
+class ReportAttachmentsViewSet(SparseFieldsMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for ReportAttachments model with full CRUD operations.
     
@@ -262,6 +453,7 @@ class ReportAttachmentsViewSet(viewsets.ModelViewSet):
     - PUT /api/report-attachments/{id}/ - Update report attachment
     - PATCH /api/report-attachments/{id}/ - Partial update report attachment
     - DELETE /api/report-attachments/{id}/ - Delete report attachment
+    - GET /api/report-attachments/{id}/download/ - Download the attachment file
     """
     queryset = ReportAttachments.objects.all()
     serializer_class = ReportAttachmentsSerializer
@@ -271,3 +463,38 @@ class ReportAttachmentsViewSet(viewsets.ModelViewSet):
     search_fields = ['caption', 'report__report_number']
     ordering_fields = ['attachment_id', 'uploaded_at']
     ordering = ['-uploaded_at']
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Stream the attachment file (supports Range and conditional requests)."""
+        attachment = self.get_object()
+        if not attachment.file_path:
+            return Response({'error': 'Attachment has no file'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(request, attachment.file_path, filename=attachment.original_filename or None)
+
+
+class ComplianceStatusViewSet(SparseFieldsMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for the weekly compliance results written by the compliance scan.
+    
+    Available endpoints:
+    - GET /api/compliance/ - List compliance results (filter by week_start, status, equipment)
+    - GET /api/compliance/{id}/ - Retrieve specific compliance result
+    - POST /api/compliance/scan/ - Rescan the current and previous week (staff only)
+    """
+    queryset = ComplianceStatus.objects.all()
+    serializer_class = ComplianceStatusSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['equipment', 'week_start', 'status']
+    ordering_fields = ['week_start', 'equipment', 'recorded_cells', 'missing_days', 'scanned_at']
+    ordering = ['-week_start', 'equipment']
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def scan(self, request):
+        """Recompute compliance for the current week and the week before."""
+        results = compliance.scan(weeks=2)
+        return Response(
+            [{'week_start': week_start, 'counts': counts} for week_start, counts in results],
+            status=status.HTTP_200_OK,
+        )